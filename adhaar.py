@@ -1,15 +1,10 @@
-import google.generativeai as genai
-from dotenv import load_dotenv
-import os
-import PIL.Image
-import json
+from image_utils import model_input
+from admission import Overloaded
+from llm_providers import get_provider, parse_json_response
 
-load_dotenv()
-GOOGLE_API = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API)
 
 # Define the function
-def extract_adhaar_details_from_image(image_path: str) -> dict:
+def extract_adhaar_details(image) -> dict:
     prompt = """
         Analyze the following text and extract the following details:  
     - Name (typically the card holder's name).
@@ -47,26 +42,24 @@ def extract_adhaar_details_from_image(image_path: str) -> dict:
     """
     
     try:
-        # Load the image
-        image = PIL.Image.open(image_path)
+        # Accept a path, bytes, PIL image, ndarray or an encoded upload blob
+        image = model_input(image)
 
-        # Generate content
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        response = model.generate_content(
-            contents=[image, prompt],
-            generation_config=genai.types.GenerationConfig(temperature=0)
-        )
+        # Generate content through the configured provider
+        text = get_provider("gemini").complete(prompt, image=image, task="adhaar", temperature=0)
 
-        # Extract text and clean it
-        raw_text = response.text.strip().strip("```json").strip("```").strip()
-        
-        print("collectd_daya==============>",json.loads(raw_text))
         # Parse and return JSON
-        return json.loads(raw_text)
+        return parse_json_response(text, "adhaar")
     
+    except Overloaded:
+        raise  # 🚦 shed load instead of reporting a failed extraction
     except Exception as e:
         return {
             "Name": "Error",
             "DOB": "Error",
             "Number": f"Error: {str(e)}"
         }
+
+# 📂 Path-based entry point
+def extract_adhaar_details_from_image(image_path: str) -> dict:
+    return extract_adhaar_details(image_path)
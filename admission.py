@@ -0,0 +1,180 @@
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import jsonify, request
+
+from metrics import ADMISSION_REJECTIONS, LLM_RATE_WAIT, STAGE_ACTIVE, STAGE_QUEUE_DEPTH
+
+# ⚙️ Admission control (all limits are per process)
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "0"))  # POST requests; 0 = unlimited
+ADMISSION_RETRY_AFTER = float(os.getenv("ADMISSION_RETRY_AFTER", "2"))
+# Concurrent calls per stage, e.g. "ocr=4,classify=8,extract=8"
+STAGE_LIMITS = {
+    name: int(limit) for name, limit in
+    (item.split("=", 1) for item in os.getenv("STAGE_LIMITS", "ocr=4,classify=8,extract=8").split(",") if "=" in item)
+}
+STAGE_MAX_WAITING = int(os.getenv("STAGE_MAX_WAITING", "16"))  # callers queued per stage before we shed load
+STAGE_WAIT_TIMEOUT = float(os.getenv("STAGE_WAIT_TIMEOUT", "15"))
+# Provider quotas as requests/min:tokens/min, e.g. "gemini=60:1000000,groq=30:6000" (0 = unlimited)
+LLM_RATE_LIMITS = {
+    name: tuple(int(value) for value in limits.split(":", 1)) for name, limits in
+    (item.split("=", 1) for item in os.getenv("LLM_RATE_LIMITS", "").split(",") if "=" in item)
+}
+LLM_RATE_MAX_WAIT = float(os.getenv("LLM_RATE_MAX_WAIT", "5"))  # longer waits are answered with 429
+IMAGE_TOKENS = 258  # Gemini's per-image token charge
+DEFAULT_OUTPUT_TOKENS = 256
+
+class Overloaded(Exception):
+    """Shed load: answered with `status` (429 / 503) and a Retry-After header."""
+
+    def __init__(self, message, status=503, retry_after=ADMISSION_RETRY_AFTER):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+# 🚦 Bounded concurrency for one stage, with a bounded waiting line
+class StageLimiter:
+    def __init__(self, name, limit, max_waiting=STAGE_MAX_WAITING, timeout=STAGE_WAIT_TIMEOUT):
+        self.name = name
+        self.slots = threading.BoundedSemaphore(limit)
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self.waiting = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            if self.waiting >= self.max_waiting:
+                ADMISSION_REJECTIONS.inc(stage=self.name, reason="queue_full")
+                raise Overloaded(f"{self.name} queue is full")
+            self.waiting += 1
+            STAGE_QUEUE_DEPTH.set(self.waiting, stage=self.name)
+        try:
+            acquired = self.slots.acquire(timeout=self.timeout)
+        finally:
+            with self.lock:
+                self.waiting -= 1
+                STAGE_QUEUE_DEPTH.set(self.waiting, stage=self.name)
+        if not acquired:
+            ADMISSION_REJECTIONS.inc(stage=self.name, reason="timeout")
+            raise Overloaded(f"Timed out waiting for {self.name}")
+        STAGE_ACTIVE.inc(stage=self.name)
+
+    def release(self):
+        STAGE_ACTIVE.dec(stage=self.name)
+        self.slots.release()
+
+_stages = {name: StageLimiter(name, limit) for name, limit in STAGE_LIMITS.items() if limit > 0}
+
+# Returns a release function (for work that finishes in a callback, e.g. OCR futures)
+def acquire_stage(stage):
+    limiter = _stages.get(stage)
+    if limiter is None:
+        return lambda: None
+    limiter.acquire()
+    return limiter.release
+
+@contextmanager
+def stage_slot(stage):
+    release = acquire_stage(stage)
+    try:
+        yield
+    finally:
+        release()
+
+# 🪣 Token bucket refilled continuously at `per_minute`; may go negative to queue callers
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+# ⏳ Requests/min + tokens/min quota for one LLM provider
+class RateLimiter:
+    def __init__(self, name, requests_per_minute=0, tokens_per_minute=0):
+        self.name = name
+        self.buckets = [(bucket, unit) for bucket, unit in
+                        ((TokenBucket(requests_per_minute), "requests"), (TokenBucket(tokens_per_minute), "tokens"))
+                        if bucket.capacity > 0]
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens, max_wait=LLM_RATE_MAX_WAIT):
+        if not self.buckets:
+            return
+        amounts = {"requests": 1, "tokens": tokens}
+        with self.lock:
+            wait = max(bucket.wait_time(amounts[unit]) for bucket, unit in self.buckets)
+            if wait > max_wait:
+                ADMISSION_REJECTIONS.inc(stage=f"llm_{self.name}", reason="rate_limit")
+                raise Overloaded(f"{self.name} rate limit reached", status=429, retry_after=wait)
+            # Reserve now so concurrent callers line up behind this one
+            for bucket, unit in self.buckets:
+                bucket.consume(amounts[unit])
+        if wait > 0:
+            LLM_RATE_WAIT.observe(wait, provider=self.name)
+            time.sleep(wait)
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+def rate_limiter(provider):
+    with _rate_limiters_lock:
+        if provider not in _rate_limiters:
+            _rate_limiters[provider] = RateLimiter(provider, *LLM_RATE_LIMITS.get(provider, (0, 0)))
+        return _rate_limiters[provider]
+
+# 🔢 Rough token cost of a call: ~4 characters per token, plus images and the reply
+def estimate_tokens(prompt, image=None, max_output_tokens=None):
+    return len(prompt) // 4 + (IMAGE_TOKENS if image is not None else 0) + (max_output_tokens or DEFAULT_OUTPUT_TOKENS)
+
+# 🤝 Take over this request's in-flight slot; returns its release function. For
+# responses whose work outlives the view (streaming), so the slot is released
+# when the work ends rather than at teardown.
+def take_admission_slot():
+    return request.environ.pop("admission.release", None) or (lambda: None)
+
+# 🔌 429/503 + Retry-After for Overloaded, and an optional cap on in-flight POSTs
+def register_admission(app):
+    in_flight = {"count": 0}
+    lock = threading.Lock()
+
+    @app.before_request
+    def _admit():
+        if request.method != "POST" or ADMISSION_MAX_IN_FLIGHT <= 0:
+            return None
+        with lock:
+            if in_flight["count"] >= ADMISSION_MAX_IN_FLIGHT:
+                ADMISSION_REJECTIONS.inc(stage="http", reason="in_flight")
+                raise Overloaded("Server busy")
+            in_flight["count"] += 1
+
+        def release():
+            with lock:
+                in_flight["count"] -= 1
+
+        # Popped by exactly one owner: teardown, or a stream via take_admission_slot
+        request.environ["admission.release"] = release
+
+    @app.teardown_request
+    def _release(exc):
+        take_admission_slot()()
+
+    @app.errorhandler(Overloaded)
+    def _overloaded(e):
+        return jsonify({"error": str(e)}), e.status, {"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+
+    return app
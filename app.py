@@ -1,21 +1,29 @@
 
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, jsonify, render_template
 from flask_cors import CORS
 from PIL import Image
-import base64
 import io
-import requests
 import os
 import cv2
 import numpy as np
 from dotenv import load_dotenv
-from datetime import datetime
-import json
-from paddleocr import PaddleOCR  # ✅ PaddleOCR
+import ocr_pool  # ✅ PaddleOCR, in-process or in dedicated OCR worker processes
+from image_utils import normalize_image
+from llm_client import prewarm
+from llm_providers import get_provider, parse_json_response
+from metrics import register_metrics, time_stage
+from admission import Overloaded, register_admission, stage_slot
+from model_registry import register_health
+from preprocessing import run_pipeline, resolve_profile
+from image_writer import save_images_async
+from uploads import UploadError, read_image_upload
 
 # 🌍 App setup
 app = Flask(__name__)
 CORS(app)
+register_metrics(app)  # 📈 /metrics
+register_health(app, required=("ocr", "groq"))  # 🩺 /healthz, /readyz
+register_admission(app)  # 🚦 429/503 + Retry-After under overload
 
 # 🔐 Load API key
 load_dotenv()
@@ -23,36 +31,14 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 LLAMA_MODEL = "llama3-70b-8192"
 
-# 🖼️ Save directory
-IMAGE_SAVE_DIR = "saved_images"
-os.makedirs(IMAGE_SAVE_DIR, exist_ok=True)
+# 🔥 Open Groq connections at startup
+if os.getenv("LLM_PREWARM", "0") == "1":
+    prewarm([GROQ_API_URL])
 
-# ✅ Initialize PaddleOCR model (English)
-ocr_model = PaddleOCR(use_angle_cls=True, lang='en', det_db_box_thresh=0.5)
-
-# 🧪 Image preprocessing
-def preprocess_image(image):
+# 🧪 Image preprocessing (stage chains live in preprocessing.PROFILES)
+def preprocess_image(image, profile="default"):
     try:
-        opencv_img = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        gray = cv2.cvtColor(opencv_img, cv2.COLOR_BGR2GRAY)
-
-        coords = np.column_stack(np.where(gray > 0))
-        angle = cv2.minAreaRect(coords)[-1]
-        angle = -(90 + angle) if angle < -45 else -angle
-
-        (h, w) = gray.shape
-        center = (w // 2, h // 2)
-        matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
-        rotated = cv2.warpAffine(opencv_img, matrix, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
-
-        gray_rotated = cv2.cvtColor(rotated, cv2.COLOR_BGR2GRAY)
-        threshold = cv2.adaptiveThreshold(gray_rotated, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                          cv2.THRESH_BINARY, 11, 3)
-        denoised = cv2.GaussianBlur(threshold, (5, 5), 0)
-        kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])
-        sharpened = cv2.filter2D(denoised, -1, kernel)
-
-        enhanced_image = Image.fromarray(cv2.cvtColor(sharpened, cv2.COLOR_GRAY2RGB))
+        enhanced_image, timings = run_pipeline(image, profile)
         return enhanced_image
     except Exception as e:
         print(f"❌ Error during preprocessing: {e}")
@@ -60,27 +46,14 @@ def preprocess_image(image):
 
 # 🧠 Call Groq LLaMA
 def call_groq_llama(prompt):
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    body = {
-        "model": LLAMA_MODEL,
-        "messages": [
-            {
-                "role": "system",
-                "content": "You are an AI that extracts structured personal details from OCR text extracted from Indian ID cards."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
-        "temperature": 0.3
-    }
-    response = requests.post(GROQ_API_URL, headers=headers, json=body)
-    response.raise_for_status()
-    return response.json()["choices"][0]["message"]["content"]
+    # 🔀 Groq (or the stub server) behind the provider interface
+    with stage_slot("extract"):
+        return get_provider("groq").complete(
+            prompt,
+            task="groq_extract",
+            system="You are an AI that extracts structured personal details from OCR text extracted from Indian ID cards.",
+            temperature=0.3
+        )
 
 # 🧹 Clean OCR text
 def clean_ocr_text(raw_text):
@@ -92,36 +65,27 @@ def clean_ocr_text(raw_text):
 # 🚀 Main extraction route
 @app.route("/extract", methods=["POST"])
 def extract_card_info():
+    saved_images = None
     try:
-        data = request.get_json()
-        image_base64 = data.get("image")
-        if not image_base64:
-            return jsonify({"error": "No image provided"}), 400
-        if "," in image_base64:
-            image_base64 = image_base64.split(",")[1]
-
-        image_bytes = base64.b64decode(image_base64)
-        image = Image.open(io.BytesIO(image_bytes))
-
-        # Save input image
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        saved_image_path = os.path.join(IMAGE_SAVE_DIR, f"input_image_{timestamp}.png")
-        image.save(saved_image_path)
-        print(f"✅ Image saved at {saved_image_path}")
+        # 📥 Multipart, raw image/* or base64 JSON body; 📏 resolution capped right after decode
+        with time_stage("decode"):
+            image_bytes, data = read_image_upload()
+            image = normalize_image(Image.open(io.BytesIO(image_bytes)))
 
         # Preprocess image
-        enhanced_image = preprocess_image(image)
-        enhanced_path = os.path.join(IMAGE_SAVE_DIR, f"enhanced_image_{timestamp}.png")
-        enhanced_image.save(enhanced_path)
+        profile = resolve_profile(data.get("profile"), data.get("card_type"))
+        enhanced_image = preprocess_image(image, profile)
+        # 🖼️ Input + enhanced images are saved in the background after the result is known
+        saved_images = {"input_image": image, "enhanced_image": enhanced_image}
 
         # 🧾 Run PaddleOCR
         opencv_img = cv2.cvtColor(np.array(enhanced_image), cv2.COLOR_RGB2BGR)
-        ocr_results = ocr_model.ocr(opencv_img, cls=True)
+        with time_stage("ocr"):
+            ocr_results = ocr_pool.run_ocr(opencv_img)
         raw_text = " ".join([line[1][0] for line in ocr_results[0]])
 
-        print("🧾 OCR Text:\n", raw_text)
-
         if not raw_text.strip():
+            save_images_async(saved_images, failed=True)
             return jsonify({"error": "OCR returned no readable text. Please check image quality."}), 400
 
         prompt = f"""
@@ -145,18 +109,25 @@ def extract_card_info():
     Output:
 """
 
-        structured_response = call_groq_llama(prompt)
-        print("✅ Groq Response:\n", structured_response)
+        with time_stage("extract"):
+            structured_response = call_groq_llama(prompt)
 
         try:
-            extracted_data = json.loads(structured_response)
+            extracted_data = parse_json_response(structured_response, "groq_extract")
         except Exception as e:
             extracted_data = {"error": "Failed to parse Groq response", "details": str(e)}
 
+        save_images_async(saved_images, failed="error" in extracted_data)
         return jsonify({"result": extracted_data})
 
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    except Overloaded:
+        raise  # 🚦 answered with 429/503 + Retry-After
     except Exception as e:
         print(f"❌ Error during OCR extraction: {e}")
+        if saved_images is not None:
+            save_images_async(saved_images, failed=True)  # crashed requests count as failures
         return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
 
 # 🎨 Frontend
@@ -1,30 +1,37 @@
 
 from flask import Flask, request, jsonify, render_template
 from flask_cors import CORS
-from PIL import Image
-import base64
+from PIL import Image, UnidentifiedImageError
 import io
-import requests
 import os
+import threading
 import cv2
 import numpy as np
 from dotenv import load_dotenv
-from datetime import datetime
-import json
-from paddleocr import PaddleOCR  # ✅ PaddleOCR
-from pan import extract_pan_details_from_image
-from udayam import extract_udayam_details_from_image
-from adhaar import extract_adhaar_details_from_image
-from card_classifier import classify_document_type_from_image
-
-import google.generativeai as genai
-import PIL.Image
-from main import classify
+from concurrent.futures import ThreadPoolExecutor
+import ocr_pool  # ✅ PaddleOCR, in-process or in dedicated OCR worker processes
+from image_utils import normalize_image
+from preprocessing import run_pipeline, resolve_profile, get_stage_stats
+from main import classify_image, classify_text, has_extraction_error
+from ocr_classifier import local_card_type, get_classifier_stats, ocr_lines
+from local_extractor import extract_fields_from_ocr
+from result_cache import cache_key, get_cached, set_cached, get_cache_stats
+from image_writer import save_images_async, get_image_writer_stats
+from metrics import register_metrics, time_stage, CARD_TYPES
+from uploads import UploadError, read_batch_uploads, read_image_upload, read_pdf_upload
+from pdf_ingest import check_pdf, map_pages
+from streaming import StreamCancelled, emit_fields, respond
+from job_queue import enqueue, get_job, get_queue_stats, start_workers
+from admission import Overloaded, register_admission
+from model_registry import register_health
 
 
 # 🌍 App setup
 app = Flask(__name__)
 CORS(app)
+register_metrics(app)  # 📈 /metrics
+register_health(app, required=("ocr", "gemini"))  # 🩺 /healthz, /readyz
+register_admission(app)  # 🚦 429/503 + Retry-After under overload
 
 # 🔐 Load API key
 load_dotenv()
@@ -32,36 +39,22 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 LLAMA_MODEL = "llama3-70b-8192"
 
-# 🖼️ Save directory
-IMAGE_SAVE_DIR = "saved_images"
-os.makedirs(IMAGE_SAVE_DIR, exist_ok=True)
+# 📏 Rule-based extraction from OCR before falling back to the LLM
+LOCAL_EXTRACTION = os.getenv("LOCAL_EXTRACTION", "1") == "1"
+
+# 📚 Batch extraction limits
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "200"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+BATCH_WINDOW = int(os.getenv("BATCH_WINDOW", "16"))  # items decoded / in flight at once
 
-# ✅ Initialize PaddleOCR model (English)
-ocr_model = PaddleOCR(use_angle_cls=True, lang='en', det_db_box_thresh=0.5)
+# 🗂️ Job worker threads started in this process. Off by default so HTTP workers
+# stay free; `python job_worker.py` drains the queue (it sets JOB_WORKERS=4)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "0"))
 
-# 🧪 Image preprocessing
-def preprocess_image(image):
+# 🧪 Image preprocessing (stage chains live in preprocessing.PROFILES)
+def preprocess_image(image, profile="default"):
     try:
-        opencv_img = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        gray = cv2.cvtColor(opencv_img, cv2.COLOR_BGR2GRAY)
-
-        coords = np.column_stack(np.where(gray > 0))
-        angle = cv2.minAreaRect(coords)[-1]
-        angle = -(90 + angle) if angle < -45 else -angle
-
-        (h, w) = gray.shape
-        center = (w // 2, h // 2)
-        matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
-        rotated = cv2.warpAffine(opencv_img, matrix, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
-
-        gray_rotated = cv2.cvtColor(rotated, cv2.COLOR_BGR2GRAY)
-        threshold = cv2.adaptiveThreshold(gray_rotated, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                          cv2.THRESH_BINARY, 11, 3)
-        denoised = cv2.GaussianBlur(threshold, (5, 5), 0)
-        kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])
-        sharpened = cv2.filter2D(denoised, -1, kernel)
-
-        enhanced_image = Image.fromarray(cv2.cvtColor(sharpened, cv2.COLOR_GRAY2RGB))
+        enhanced_image, timings = run_pipeline(image, profile)
         return enhanced_image
     except Exception as e:
         print(f"❌ Error during preprocessing: {e}")
@@ -76,39 +69,302 @@ def clean_ocr_text(raw_text):
 
 
 
+# 🖼️ Decode, normalize and preprocess one upload
+def prepare_images(image_bytes, profile):
+    # 📏 Cap resolution right after decode
+    with time_stage("decode"):
+        image = normalize_image(Image.open(io.BytesIO(image_bytes)))
+    # Preprocess (kept in memory, no temp file handoff)
+    enhanced_image = preprocess_image(image, profile)
+    return image, enhanced_image
+
+# 🧾 PaddleOCR over one enhanced image (OCR_POOL_SIZE > 0 -> OCR worker processes)
+def submit_ocr(enhanced_image):
+    opencv_img = cv2.cvtColor(np.array(enhanced_image), cv2.COLOR_RGB2BGR)
+    return ocr_pool.submit_ocr(opencv_img)
+
+def run_ocr(enhanced_image):
+    with time_stage("ocr"):
+        return submit_ocr(enhanced_image).result()
+
+# 📏 Local classification/extraction from OCR lines; returns (card type or None, result or None)
+def extract_locally(ocr_results):
+    with time_stage("classify_local"):
+        card_type = local_card_type(ocr_results)
+
+    # ✅ Every required field validated locally -> no LLM call at all
+    if card_type and LOCAL_EXTRACTION:
+        with time_stage("extract_local"):
+            local_fields = extract_fields_from_ocr(card_type, ocr_results)
+        if local_fields is not None:
+            return card_type, {"card_type": card_type, "data": local_fields}
+    return card_type, None
+
+# 🔥 Local classification/extraction first, Gemini only when not confident (None for unknown cards)
+def extract_from_ocr(enhanced_image, ocr_results, on_card_type=None):
+    card_type, collected_data = extract_locally(ocr_results)
+    if card_type and on_card_type:
+        on_card_type(card_type)
+    return collected_data or classify_image(enhanced_image, card_type, on_card_type=on_card_type)
+
+# 📝 Same for a PDF text layer: local first, then a text-only Gemini prompt
+def extract_from_text(text_lines):
+    card_type, collected_data = extract_locally(text_lines)
+    return collected_data or classify_text("\n".join(ocr_lines(text_lines)))
+
+# 🧮 Cache + background save bookkeeping for a finished extraction
+def finish_extraction(key, saved_images, collected_data):
+    CARD_TYPES.inc(card_type=collected_data["card_type"] if collected_data else "Unknown")
+    failed = collected_data is None or has_extraction_error(collected_data)
+    save_images_async(saved_images, failed=failed)
+    if not failed:
+        set_cached(key, collected_data)
+
+# 🪪 One image through the whole pipeline; returns (body, status). `emit` receives
+# the accepted / card_type / field events (see streaming.respond)
+def extract_image(image_bytes, profile, emit=lambda event: None):
+    # ⚡ Same capture (and preprocessing profile) submitted again -> cached result
+    key = cache_key(image_bytes, f"extract:{profile}")
+    cached = get_cached(key)
+    if cached is not None:
+        return cached, 200
+
+    emit({"event": "accepted", "bytes": len(image_bytes), "profile": profile})
+    image, enhanced_image = prepare_images(image_bytes, profile)
+    # 🖼️ Input + enhanced images are saved in the background after the result is known
+    saved_images = {"input_image": image, "enhanced_image": enhanced_image}
+
+    try:
+        collected_data = extract_from_ocr(
+            enhanced_image, run_ocr(enhanced_image),
+            on_card_type=lambda card_type: emit({"event": "card_type", "card_type": card_type})
+        )
+    except (StreamCancelled, Overloaded):
+        raise  # client left / load shedding, not a pipeline failure
+    except Exception:
+        save_images_async(saved_images, failed=True)  # crashed requests count as failures
+        raise
+    finish_extraction(key, saved_images, collected_data)
+    if collected_data is None:
+        return {"error": "Invalid Card Type"}, 400
+    emit_fields(emit, collected_data)
+    return collected_data, 200
+
 @app.route("/extract", methods=["POST"])
 def extract_card_info():
     try:
-        data = request.get_json()
-        image_base64 = data.get("image")
-        if not image_base64:
-            return jsonify({"error": "No image provided"}), 400
-        if "," in image_base64:
-            image_base64 = image_base64.split(",")[1]
+        # 📥 Multipart, raw image/* or base64 JSON body
+        with time_stage("upload_read"):  # the PIL decode is timed as "decode" in prepare_images
+            image_bytes, data = read_image_upload()
+
+        profile = resolve_profile(data.get("profile"), data.get("card_type"))
+        # 📡 ?stream=ndjson|sse sends accepted / card_type / field events before the result
+        return respond(lambda emit: extract_image(image_bytes, profile, emit), "extract")
+
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    except Overloaded:
+        raise  # 🚦 answered with 429/503 + Retry-After
+    except Exception as e:
+        print(f"❌ Error during OCR extraction: {e}")
+        return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
 
-        image_bytes = base64.b64decode(image_base64)
-        image = Image.open(io.BytesIO(image_bytes))
+# 🧾 Decode -> OCR -> local/LLM extraction for one batch item; returns its result entry.
+# The images only live while the item is in flight.
+def extract_batch_item(index, key, image_bytes, profile):
+    try:
+        image, enhanced_image = prepare_images(image_bytes, profile)
+    except Exception as e:
+        return {"index": index, "error": f"Invalid image: {str(e)}"}
+    try:
+        ocr_results = run_ocr(enhanced_image)
+    except Exception as e:
+        return {"index": index, "error": f"OCR failed: {str(e)}"}
+    try:
+        collected_data = extract_from_ocr(enhanced_image, ocr_results)
+    except Exception as e:
+        finish_extraction(key, {"input_image": image, "enhanced_image": enhanced_image}, None)
+        return {"index": index, "error": f"Unexpected error: {str(e)}"}
+    finish_extraction(key, {"input_image": image, "enhanced_image": enhanced_image}, collected_data)
+    if collected_data is None:
+        return {"index": index, "error": "Invalid Card Type"}
+    return {"index": index, **collected_data}
+
+@app.route("/extract/batch", methods=["POST"])
+def extract_batch():
+    try:
+        uploads = read_batch_uploads()
+        if not uploads:
+            return jsonify({"error": "No images provided"}), 400
+        if len(uploads) > BATCH_MAX_ITEMS:
+            return jsonify({"error": f"Batch limited to {BATCH_MAX_ITEMS} images"}), 413
+
+        data = request.get_json(silent=True) or request.form
+        profile = resolve_profile(data.get("profile"), data.get("card_type"))
+        results = [None] * len(uploads)
+
+        # 🧾 Each item runs decode -> OCR -> LLM inside the LLM pool, so one item's
+        # LLM wait overlaps the next items' OCR whether OCR runs in the OCR worker
+        # processes or in-process (OCR_POOL_SIZE=0). An item is only decoded once a
+        # window slot is free, so at most BATCH_WINDOW items hold images at once.
+        slots = threading.BoundedSemaphore(BATCH_WINDOW)
+        futures = {}
+        with ThreadPoolExecutor(max_workers=BATCH_LLM_CONCURRENCY) as llm_pool:
+            for index, image_bytes in enumerate(uploads):
+                if isinstance(image_bytes, Exception):
+                    results[index] = {"index": index, "error": f"Invalid image: {str(image_bytes)}"}
+                    continue
+                key = cache_key(image_bytes, f"extract:{profile}")
+                cached = get_cached(key)
+                if cached is not None:
+                    results[index] = {"index": index, **cached}
+                    continue
+                slots.acquire()
+                future = llm_pool.submit(extract_batch_item, index, key, image_bytes, profile)
+                future.add_done_callback(lambda _: slots.release())
+                futures[index] = future
+
+        for index, future in futures.items():
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                results[index] = {"index": index, "error": f"Unexpected error: {str(e)}"}
+        return jsonify({"results": results})
+
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    except Overloaded:
+        raise  # 🚦 answered with 429/503 + Retry-After
+    except Exception as e:
+        print(f"❌ Error during batch extraction: {e}")
+        return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
+
+# 📄 Multi-page PDF: pages rasterized lazily and extracted in parallel, one result per page
+def extract_pdf_document(pdf_bytes, profile):
+    key = cache_key(pdf_bytes, f"pdf:{profile}")
+    cached = get_cached(key)
+    if cached is not None:
+        return cached, 200
+
+    def handle_page(index, image):
+        enhanced_image = preprocess_image(image, profile)
+        collected_data = extract_from_ocr(enhanced_image, run_ocr(enhanced_image))
+        CARD_TYPES.inc(card_type=collected_data["card_type"] if collected_data else "Unknown")
+        return collected_data
+
+    # ⚡ Pages with an embedded text layer skip rendering and OCR
+    def handle_text(index, text_lines):
+        collected_data = extract_from_text(text_lines)
+        CARD_TYPES.inc(card_type=collected_data["card_type"] if collected_data else "Unknown")
+        return collected_data
+
+    pages = []
+    failed = False
+    for index, outcome in enumerate(map_pages(pdf_bytes, handle_page, handle_text)):
+        if isinstance(outcome, Exception):
+            failed = True
+            pages.append({"page": index + 1, "error": f"Unexpected error: {str(outcome)}"})
+        elif outcome is None:
+            pages.append({"page": index + 1, "error": "Invalid Card Type"})
+        else:
+            failed = failed or has_extraction_error(outcome)
+            pages.append({"page": index + 1, **outcome})
+
+    result = {"pages": pages}
+    if not failed:
+        set_cached(key, result)
+    return result, 200
+
+@app.route("/extract/pdf", methods=["POST"])
+def extract_pdf():
+    try:
+        pdf_bytes, data = read_pdf_upload()
+        profile = resolve_profile(data.get("profile"), data.get("card_type"))
+        body, status = extract_pdf_document(pdf_bytes, profile)
+        return jsonify(body), status
+
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    except Overloaded:
+        raise  # 🚦 answered with 429/503 + Retry-After
+    except Exception as e:
+        print(f"❌ Error during PDF extraction: {e}")
+        return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
 
-        # Save image
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        saved_image_path = os.path.join(IMAGE_SAVE_DIR, f"input_image_{timestamp}.png")
-        image.save(saved_image_path)
+# 🗂️ Asynchronous jobs: the upload is queued durably and processed by the job workers
+# (`python job_worker.py`, or JOB_WORKERS threads in this process), off the HTTP workers
+def run_image_job(payload, options):
+    return extract_image(payload, resolve_profile(options.get("profile"), options.get("card_type")))[0]
 
-        # Preprocess
-        enhanced_image = preprocess_image(image)
-        enhanced_path = os.path.join(IMAGE_SAVE_DIR, f"enhanced_image_{timestamp}.png")
-        enhanced_image.save(enhanced_path)
+def run_pdf_job(payload, options):
+    return extract_pdf_document(payload, resolve_profile(options.get("profile"), options.get("card_type")))[0]
 
-        # 🔥 Get classification + result
-        collected_data = classify(enhanced_path)
+JOB_HANDLERS = {"image": run_image_job, "pdf": run_pdf_job}
+# Bad uploads fail on the first attempt; retrying cannot fix them
+start_workers(JOB_HANDLERS, JOB_WORKERS, terminal=(UploadError, UnidentifiedImageError))
 
-        return jsonify(collected_data)
+def is_pdf_upload():
+    if request.mimetype == "application/pdf":
+        return True
+    file = request.files.get("file") if request.mimetype == "multipart/form-data" else None
+    return file is not None and (file.mimetype == "application/pdf" or file.filename.lower().endswith(".pdf"))
 
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    try:
+        # 🔍 Reject uploads that can never be processed before they are queued
+        if is_pdf_upload():
+            kind = "pdf"
+            payload, data = read_pdf_upload()
+            check_pdf(payload)
+        else:
+            kind = "image"
+            payload, data = read_image_upload()
+            try:
+                Image.open(io.BytesIO(payload)).verify()
+            except Exception as e:
+                raise UploadError(f"Invalid image: {str(e)}")
+        options = {name: data.get(name) for name in ("profile", "card_type") if data.get(name)}
+        job_id = enqueue(kind, payload, options)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    except Overloaded:
+        raise  # 🚦 answered with 503 + Retry-After
     except Exception as e:
-        print(f"❌ Error during OCR extraction: {e}")
+        print(f"❌ Error while queueing job: {e}")
         return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
-
-
+    return jsonify({"job_id": job_id, "status": "queued"}), 202, {"Location": f"/jobs/{job_id}"}
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job)
+
+@app.route("/jobs/stats", methods=["GET"])
+def job_stats():
+    return jsonify(get_queue_stats())
+
+# 📊 Local classifier fallback rate
+@app.route("/classifier/stats", methods=["GET"])
+def classifier_stats():
+    return jsonify(get_classifier_stats())
+
+# 📊 Result cache hit/miss counters
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(get_cache_stats())
+
+# ⏱️ Average time per preprocessing stage
+@app.route("/preprocess/stats", methods=["GET"])
+def preprocess_stats():
+    return jsonify(get_stage_stats())
+
+# 📊 Background image writer (queued / saved / dropped)
+@app.route("/images/stats", methods=["GET"])
+def image_writer_stats():
+    return jsonify(get_image_writer_stats())
 
 
 # # 🚀 Main extraction route
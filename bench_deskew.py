@@ -0,0 +1,46 @@
+import time
+import tracemalloc
+import cv2
+import numpy as np
+from deskew import deskew
+
+SAMPLES = ["pan_dummy_1.jpg", "pan_dummy_2.jpg", "pan_dummy_3.jpg",
+           "adhaar_dummy.jpg", "adhaar_arun.jpg", "adhaar_faris.jpg"]
+REPEATS = 5
+
+# 🐢 Previous implementation from preprocess_image (minAreaRect over every nonzero pixel)
+def legacy_deskew(opencv_img, gray):
+    coords = np.column_stack(np.where(gray > 0))
+    angle = cv2.minAreaRect(coords)[-1]
+    angle = -(90 + angle) if angle < -45 else -angle
+
+    (h, w) = gray.shape
+    matrix = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+    rotated = cv2.warpAffine(opencv_img, matrix, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+    return rotated, angle
+
+def measure(func, opencv_img, gray):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        _, angle = func(opencv_img, gray)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    func(opencv_img, gray)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sorted(timings)[len(timings) // 2], peak / 1e6, angle
+
+if __name__ == "__main__":
+    print(f"{'sample':<20}{'size':>12}{'legacy ms':>11}{'new ms':>9}{'legacy MB':>11}{'new MB':>9}{'legacy deg':>12}{'new deg':>9}")
+    for sample in SAMPLES:
+        opencv_img = cv2.imread(sample)
+        if opencv_img is None:
+            print(f"{sample:<20} missing")
+            continue
+        gray = cv2.cvtColor(opencv_img, cv2.COLOR_BGR2GRAY)
+        old_ms, old_mb, old_angle = measure(legacy_deskew, opencv_img, gray)
+        new_ms, new_mb, new_angle = measure(deskew, opencv_img, gray)
+        size = f"{gray.shape[1]}x{gray.shape[0]}"
+        print(f"{sample:<20}{size:>12}{old_ms:>11.1f}{new_ms:>9.1f}{old_mb:>11.1f}{new_mb:>9.1f}{old_angle:>12.2f}{new_angle:>9.2f}")
@@ -0,0 +1,66 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# ⏱️ Cold import time of each app module (fresh interpreter per run), plus the
+# slowest imports reported by `python -X importtime`
+SAMPLE_DIR = os.path.dirname(os.path.abspath(__file__))
+APPS = ["main", "app", "app_v1", "app_v2", "app_v3", "app_v4"]
+
+def time_import(module, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", f"import {module}"], cwd=SAMPLE_DIR,
+                              capture_output=True, text=True)
+        timings.append((time.perf_counter() - start) * 1000)
+        if proc.returncode != 0:
+            return None, proc.stderr.strip().splitlines()[-1]
+    return round(statistics.median(timings), 1), None
+
+def slowest_imports(module, top):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=SAMPLE_DIR,
+                          capture_output=True, text=True)
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # direct imports of the module only: deeper ones are already in their parent's cumulative time
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            entries.append((int(cumulative) / 1000, name.strip()))
+    return sorted(entries, reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark for the app modules")
+    parser.add_argument("modules", nargs="*", default=APPS)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="slowest top-level imports to list")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        median_ms, error = time_import(module, args.repeats)
+        if error:
+            print(f"❌ {module}: {error}")
+            results[module] = {"error": error}
+            continue
+        slowest = slowest_imports(module, args.top)
+        results[module] = {"median_ms": median_ms, "slowest": [{"module": name, "ms": ms} for ms, name in slowest]}
+        print(f"✅ {module:<8}{median_ms:>10.1f} ms")
+        for ms, name in slowest:
+            print(f"   {name:<32}{ms:>10.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
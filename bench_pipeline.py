@@ -0,0 +1,231 @@
+import argparse
+import base64
+import io
+import json
+import logging
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Stub server in-process with no added latency: we measure our own overhead
+os.environ.setdefault("STUB_LATENCY", "fixed:0")
+os.environ.setdefault("STUB_ERROR_RATE", "0")
+
+from image_utils import normalize_image
+from preprocessing import PROFILES, run_pipeline
+from llm_providers import StubProvider
+
+SAMPLE_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLES = ["adhaar_dummy.jpg", "adhaar_arun.jpg", "adhaar_faris.jpg",
+           "pan_dummy_1.jpg", "pan_dummy_2.jpg", "pan_dummy_3.jpg",
+           "udayam_1.webp", "udayam_2.webp", "voter.jpg"]
+PDF_SAMPLES = ["test_doc.pdf"]
+
+# preprocess_image variant per app (see preprocess_image in each app*.py)
+APP_PROFILES = {"app": "default", "app_v1": "accurate", "app_v2": "default",
+                "app_v3": "default", "app_v4": "default"}
+
+# Mirrors the Groq prompt in app.py
+PROMPT_TEMPLATE = """
+    You are a strict JSON generator AI. From the following OCR text extracted from an Indian ID card, extract ONLY clearly visible fields and return the output as a **valid, parsable JSON object**.
+
+    Extract only the following fields if found in the text:
+    - Full Name
+    - Date of Birth
+    - Address
+    - ID Number
+
+    OCR Text:
+    {text}
+
+    Output:
+"""
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# Current (not high-water) RSS, so each stage gets its own delta
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+def timed(func, repeats):
+    timings = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, timings
+
+def summarize(timings):
+    ordered = sorted(timings)
+    return {
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+    }
+
+def load_ocr_model():
+    try:
+        from paddleocr import PaddleOCR
+    except ImportError:
+        print("⚠️ paddleocr not installed, skipping the OCR stage")
+        return None
+    return PaddleOCR(use_angle_cls=True, lang='en', det_db_box_thresh=0.5)
+
+# 🧪 Stub LLM server on a free local port
+def start_stub_server():
+    from werkzeug.serving import make_server
+    from stub_llm_server import app as stub_app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, stub_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/v1/complete"
+
+# 📏 record(name, func) times func and stores its summary plus the RSS growth it caused
+def make_recorder(stages, repeats):
+    def record(name, func, count=repeats):
+        before = current_rss_mb()
+        result, timings = timed(func, count)
+        stages[name] = {**summarize(timings), "rss_delta_mb": round(current_rss_mb() - before, 1)}
+        return result
+    return record
+
+def bench_sample(path, repeats, ocr_model, provider):
+    stages = {}
+    record = make_recorder(stages, repeats)
+
+    with open(path, "rb") as f:
+        encoded = base64.b64encode(f.read()).decode()
+
+    image_bytes = record("base64_decode", lambda: base64.b64decode(encoded))
+    image = record("pil_open", lambda: Image.open(io.BytesIO(image_bytes)).convert("RGB"))
+    image = record("normalize", lambda: normalize_image(Image.open(io.BytesIO(image_bytes))))
+
+    enhanced = image
+    for profile in PROFILES:
+        enhanced_profile = record(f"preprocess[{profile}]", lambda: run_pipeline(image, profile)[0])
+        if profile == APP_PROFILES["app"]:
+            enhanced = enhanced_profile
+
+    raw_text = "INCOME TAX DEPARTMENT GOVT. OF INDIA RAHUL SHARMA 15/08/1985 ABCDE1234F"
+    if ocr_model is not None:
+        opencv_img = cv2.cvtColor(np.array(enhanced), cv2.COLOR_RGB2BGR)
+        ocr_results = record("ocr", lambda: ocr_model.ocr(opencv_img, cls=True), count=max(1, repeats // 3))
+        raw_text = " ".join(line[1][0] for line in (ocr_results[0] or []))
+
+    prompt = record("prompt_build", lambda: PROMPT_TEMPLATE.format(text=" ".join(raw_text.split())))
+    text = record("llm_call_stub", lambda: provider.complete(prompt, task="pan"))
+    record("json_parse", lambda: json.loads(text.strip().strip("```json").strip("```").strip()))
+    return stages
+
+# 📄 PDF path: open, text layer, rasterization, and every page through map_pages
+# (text pages are only parsed, scanned pages preprocessed and OCRed)
+def bench_pdf(path, repeats, ocr_model):
+    from pdf_ingest import map_pages, open_pdf, page_text_lines, render_page, has_usable_text
+
+    stages = {}
+    record = make_recorder(stages, repeats)
+    with open(path, "rb") as f:
+        pdf_bytes = f.read()
+
+    def each_page(func):
+        document = open_pdf(pdf_bytes)
+        try:
+            return [func(document[index]) for index in range(document.page_count)]
+        finally:
+            document.close()
+
+    record("pdf_open", lambda: open_pdf(pdf_bytes).close())
+    text_pages = record("pdf_text_layer", lambda: each_page(lambda page: has_usable_text(page_text_lines(page))))
+    scanned = text_pages.count(False)
+    record(f"pdf_rasterize[{scanned} pages]",
+           lambda: each_page(lambda page: None if has_usable_text(page_text_lines(page)) else render_page(page).size))
+
+    def handle_page(index, image):
+        enhanced = run_pipeline(image, APP_PROFILES["app_v4"])[0]
+        if ocr_model is not None:
+            ocr_model.ocr(cv2.cvtColor(np.array(enhanced), cv2.COLOR_RGB2BGR), cls=True)
+
+    count = max(1, repeats // 3) if ocr_model is not None else repeats
+    record("pdf_map_pages", lambda: map_pages(pdf_bytes, handle_page, lambda index, text_lines: None), count=count)
+    return stages
+
+# 📉 Stages slower than the baseline by more than `tolerance`
+def compare(results, baseline, tolerance):
+    regressions = []
+    for sample, stages in results["samples"].items():
+        for stage, current in stages.items():
+            previous = baseline.get("samples", {}).get(sample, {}).get(stage)
+            if not previous or previous["median_ms"] < 1:
+                continue  # sub-millisecond stages are mostly noise
+            ratio = current["median_ms"] / previous["median_ms"]
+            if ratio > 1 + tolerance:
+                regressions.append((sample, stage, previous["median_ms"], current["median_ms"], ratio))
+    return regressions
+
+def print_stages(sample, stages):
+    print(f"✅ {sample}")
+    for stage, summary in stages.items():
+        print(f"   {stage:<26}{summary['median_ms']:>10.2f} ms  p95 {summary['p95_ms']:>9.2f} ms  rss {summary['rss_delta_mb']:>+7.1f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage pipeline benchmark over the bundled samples")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="compare against a previous results file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--no-ocr", action="store_true")
+    args = parser.parse_args()
+
+    ocr_model = None if args.no_ocr else load_ocr_model()
+    provider = StubProvider(url=start_stub_server())
+
+    results = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "repeats": args.repeats, "samples": {}}
+    for sample in SAMPLES:
+        path = os.path.join(SAMPLE_DIR, sample)
+        if not os.path.exists(path):
+            print(f"⚠️ {sample} missing, skipped")
+            continue
+        results["samples"][sample] = bench_sample(path, args.repeats, ocr_model, provider)
+        print_stages(sample, results["samples"][sample])
+    for sample in PDF_SAMPLES:
+        path = os.path.join(SAMPLE_DIR, sample)
+        if not os.path.exists(path):
+            print(f"⚠️ {sample} missing, skipped")
+            continue
+        try:
+            results["samples"][sample] = bench_pdf(path, args.repeats, ocr_model)
+        except ImportError:
+            print(f"⚠️ pymupdf not installed, skipping {sample}")
+            continue
+        print_stages(sample, results["samples"][sample])
+    results["peak_rss_mb"] = round(peak_rss_mb(), 1)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for sample, stage, before, after, ratio in regressions:
+            print(f"❌ {sample} {stage}: {before:.2f} -> {after:.2f} ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+if __name__ == "__main__":
+    main()
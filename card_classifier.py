@@ -1,14 +1,8 @@
-import google.generativeai as genai
-from dotenv import load_dotenv
-import os
-import PIL.Image
+from image_utils import model_input
+from admission import Overloaded
+from llm_providers import get_provider
 
-# Load environment variables and configure the API key
-load_dotenv()
-GOOGLE_API = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API)
-
-def classify_document_type_from_image(image_path: str) -> str:
+def classify_document_type(image) -> str:
     prompt = """
     Extract the text content and You are a document classification assistant. You will receive OCR-extracted text from an image of a government-issued document.
     Your task is to classify the type of card shown in the image by analyzing the text content.
@@ -29,20 +23,25 @@ def classify_document_type_from_image(image_path: str) -> str:
     [Aadhaar Card / PAN Card / Udyam Certificate / Unknown]
     """
     try:
-        # Load the image
-        image = PIL.Image.open(image_path)
+        # Accept a path, bytes, PIL image, ndarray or an encoded upload blob
+        image = model_input(image)
 
-        # Generate response from Gemini
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        response = model.generate_content(
-            contents=[image, prompt],
-            generation_config=genai.types.GenerationConfig(
-                temperature=0
-            )
+        # Generate content through the configured provider
+        text = get_provider("gemini").complete(
+            prompt,
+            image=image,
+            task="classify",
+            temperature=0
         )
 
         # Return the stripped response text
-        return response.text.strip()
+        return text.strip()
     
+    except Overloaded:
+        raise  # 🚦 shed load instead of reporting a failed extraction
     except Exception as e:
         return f"Error: {str(e)}"
+
+# 📂 Path-based entry point
+def classify_document_type_from_image(image_path: str) -> str:
+    return classify_document_type(image_path)
@@ -0,0 +1,79 @@
+import os
+import cv2
+import numpy as np
+
+from metrics import CARD_LOCALIZATIONS
+
+# ⚙️ Card localization settings
+CARD_LOCALIZE_MAX_SIDE = int(os.getenv("CARD_LOCALIZE_MAX_SIDE", "640"))  # contours are searched at this size
+CARD_MIN_AREA = float(os.getenv("CARD_MIN_AREA", "0.2"))  # share of the frame; smaller quads are ignored
+CARD_MAX_AREA = 0.97  # a quad covering the whole frame is the image border (already cropped)
+CARD_ASPECT_TOLERANCE = 0.25
+# Canonical width / height: ID-1 cards (Aadhaar, PAN, voter) and A4 (Udyam certificate)
+CARD_ASPECTS = (1.586, 1.414)
+
+# 🔲 Corners as top-left, top-right, bottom-right, bottom-left
+def order_corners(points):
+    points = points.reshape(4, 2).astype(np.float32)
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.array([points[np.argmin(sums)], points[np.argmin(diffs)],
+                     points[np.argmax(sums)], points[np.argmax(diffs)]], dtype=np.float32)
+
+def _side_lengths(quad):
+    top, right, bottom, left = (np.linalg.norm(quad[i] - quad[(i + 1) % 4]) for i in range(4))
+    return max(top, bottom), max(left, right)
+
+def _canonical_aspect(width, height):
+    ratio = max(width, height) / max(min(width, height), 1.0)
+    aspect = min(CARD_ASPECTS, key=lambda a: abs(a - ratio))
+    return aspect if abs(aspect - ratio) <= CARD_ASPECT_TOLERANCE else None
+
+# 📐 Document quadrilateral (full-resolution corners) from the largest convex 4-point contour
+def find_card_quad(gray, max_side=CARD_LOCALIZE_MAX_SIDE):
+    h, w = gray.shape[:2]
+    scale = min(1.0, max_side / float(max(h, w)))
+    if scale < 1.0:
+        gray = cv2.resize(gray, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))  # close small gaps in the card outline
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    frame_area = float(gray.shape[0] * gray.shape[1])
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        area = cv2.contourArea(contour) / frame_area
+        if area < CARD_MIN_AREA:
+            break
+        if area > CARD_MAX_AREA:
+            continue
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) != 4 or not cv2.isContourConvex(approx):
+            continue
+        quad = order_corners(approx) / scale
+        if _canonical_aspect(*_side_lengths(quad)) is not None:
+            return quad
+    return None
+
+# 🪪 Perspective-warp the quad to the nearest canonical aspect ratio
+def warp_card(opencv_img, quad):
+    width, height = _side_lengths(quad)
+    aspect = _canonical_aspect(width, height)
+    if width >= height:
+        size = (int(round(width)), int(round(width / aspect)))
+    else:
+        size = (int(round(height / aspect)), int(round(height)))
+    target = np.array([[0, 0], [size[0] - 1, 0], [size[0] - 1, size[1] - 1], [0, size[1] - 1]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(quad, target)
+    return cv2.warpPerspective(opencv_img, matrix, size, flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+# ✂️ Card crop of an OpenCV image; returns (image, found). Full frame when no card is found
+def localize_card(opencv_img, gray=None):
+    if gray is None:
+        gray = cv2.cvtColor(opencv_img, cv2.COLOR_BGR2GRAY) if opencv_img.ndim == 3 else opencv_img
+    quad = find_card_quad(gray)
+    if quad is None:
+        CARD_LOCALIZATIONS.inc(result="full_frame")
+        return opencv_img, False
+    CARD_LOCALIZATIONS.inc(result="cropped")
+    return warp_card(opencv_img, quad), True
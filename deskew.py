@@ -0,0 +1,45 @@
+import os
+import cv2
+import numpy as np
+
+# ⚙️ Deskew settings
+DESKEW_MAX_SIDE = int(os.getenv("DESKEW_MAX_SIDE", "800"))  # angle is estimated on this size
+DESKEW_MIN_ANGLE = float(os.getenv("DESKEW_MIN_ANGLE", "0.5"))  # degrees; smaller skew is left alone
+DESKEW_MAX_ANGLE = 45.0
+
+# 📐 Skew angle (degrees) from Hough lines on a downsampled edge map
+def estimate_skew_angle(gray, max_side=DESKEW_MAX_SIDE):
+    h, w = gray.shape[:2]
+    scale = min(1.0, max_side / float(max(h, w)))
+    if scale < 1.0:
+        gray = cv2.resize(gray, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+    edges = cv2.Canny(gray, 50, 150)
+    min_length = max(gray.shape) // 8
+    lines = cv2.HoughLinesP(edges, 1, np.pi / 360, threshold=80, minLineLength=min_length, maxLineGap=10)
+    if lines is None:
+        return 0.0
+
+    lines = lines.reshape(-1, 4).astype(np.float32)
+    x1, y1, x2, y2 = lines[:, 0], lines[:, 1], lines[:, 2], lines[:, 3]
+    angles = np.degrees(np.arctan2(y2 - y1, x2 - x1))
+    # Fold to (-90, 90] and keep near-horizontal text/card lines
+    angles = np.where(angles > 90, angles - 180, angles)
+    angles = np.where(angles <= -90, angles + 180, angles)
+    angles = angles[np.abs(angles) < DESKEW_MAX_ANGLE]
+    if angles.size == 0:
+        return 0.0
+    return float(np.median(angles))
+
+# 🔄 Rotate an OpenCV image upright; returns (image, angle)
+def deskew(opencv_img, gray=None, min_angle=DESKEW_MIN_ANGLE):
+    if gray is None:
+        gray = cv2.cvtColor(opencv_img, cv2.COLOR_BGR2GRAY) if opencv_img.ndim == 3 else opencv_img
+    angle = estimate_skew_angle(gray)
+    if abs(angle) < min_angle:
+        return opencv_img, 0.0
+
+    (h, w) = opencv_img.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+    rotated = cv2.warpAffine(opencv_img, matrix, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    return rotated, angle
@@ -0,0 +1,91 @@
+from image_utils import model_input
+from admission import Overloaded
+from llm_providers import get_provider, parse_json_response
+
+
+CARD_TYPES = ["Aadhaar Card", "PAN Card", "Udyam Certificate", "Unknown"]
+
+# 📐 Schema for the single classify + extract call
+FUSED_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "card_type": {"type": "STRING", "enum": CARD_TYPES},
+        "confidence": {"type": "NUMBER"},
+        "Name": {"type": "STRING"},
+        "DOB": {"type": "STRING"},
+        "Number": {"type": "STRING"},
+    },
+    "required": ["card_type", "confidence", "Name", "DOB", "Number"],
+}
+
+# 🧠 Prompt for the single classify + extract call
+FUSED_PROMPT = """
+    You are a document classification and extraction assistant for Indian government-issued documents.
+
+    ### Step 1 - Classify the document as one of:
+    - Aadhaar Card: "Unique Identification Authority of India", "Aadhaar", a 12-digit number, "VID", QR code.
+    - PAN Card: "Income Tax Department", "Permanent Account Number", PAN format ABCDE1234F.
+    - Udyam Certificate: "Udyam Registration", "Ministry of MSME", numbers starting with "UDYAM-".
+    - Unknown: anything else.
+
+    Set `confidence` between 0 and 1 for how sure you are of the classification.
+
+    ### Step 2 - Extract the fields for that card type:
+    - Aadhaar Card: Name = card holder's name, DOB = YYYY or DD/MM/YYYY, Number = 12-digit Aadhaar number
+      without spaces (ignore 16-digit VID numbers and 6-digit PIN codes).
+    - PAN Card: Name = card holder's name, DOB = YYYY or DD/MM/YYYY,
+      Number = 10-character PAN (5 letters + 4 digits + 1 letter).
+    - Udyam Certificate: Name = enterprise name, DOB = Udyam Registration Number (UDYAM-XX-00-0000000),
+      Number = Udyam Registration Number.
+    - If a field is not visible, or the card type is Unknown, use "Not Found".
+    """
+
+def _run_fused(prompt, image=None, task="fused"):
+    try:
+        # Accept a path, bytes, PIL image, ndarray or an encoded upload blob
+        if image is not None:
+            image = model_input(image)
+
+        # Generate content through the configured provider
+        text = get_provider("gemini").complete(
+            prompt,
+            image=image,
+            task=task,
+            temperature=0,
+            response_mime_type="application/json",
+            response_schema=FUSED_SCHEMA
+        )
+
+        # Parse and split into card type + card fields
+        result = parse_json_response(text, task)
+        return {
+            "card_type": result.get("card_type", "Unknown"),
+            "confidence": float(result.get("confidence", 0.0)),
+            "data": {
+                "Name": result.get("Name", "Not Found"),
+                "DOB": result.get("DOB", "Not Found"),
+                "Number": result.get("Number", "Not Found")
+            }
+        }
+
+    except Overloaded:
+        raise  # 🚦 shed load instead of reporting a failed extraction
+    except Exception as e:
+        return {
+            "card_type": "Unknown",
+            "confidence": 0.0,
+            "data": {},
+            "error": f"Error: {str(e)}"
+        }
+
+# Define the function
+def extract_card_details(image) -> dict:
+    return _run_fused(FUSED_PROMPT, image=image)
+
+# 📝 Text-only variant for documents that already carry their text (e.g. a PDF text layer)
+def extract_card_details_from_text(text: str) -> dict:
+    return _run_fused(FUSED_PROMPT + "\n    ### Document text:\n" + text, task="fused_text")
+
+# 📂 Path-based entry point
+def extract_card_details_from_image(image_path: str) -> dict:
+    return extract_card_details(image_path)
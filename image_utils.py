@@ -0,0 +1,76 @@
+import io
+import os
+import cv2
+import numpy as np
+import PIL.Image
+from PIL import ImageOps
+from card_localizer import localize_card
+
+# ⚙️ Normalization + upload encoding
+MAX_IMAGE_SIDE = int(os.getenv("MAX_IMAGE_SIDE", "1600"))  # ~470 DPI across an ID-1 card
+UPLOAD_FORMAT = os.getenv("UPLOAD_FORMAT", "jpeg").lower()  # jpeg / webp
+UPLOAD_QUALITY = int(os.getenv("UPLOAD_QUALITY", "85"))
+
+# 🖼️ PIL image from a path, raw bytes, a PIL image or an OpenCV (BGR) ndarray
+def load_image(source):
+    if isinstance(source, PIL.Image.Image):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return PIL.Image.open(io.BytesIO(source))
+    if isinstance(source, np.ndarray):
+        if source.ndim == 3 and source.shape[2] == 3:
+            source = source[:, :, ::-1]  # BGR -> RGB
+        return PIL.Image.fromarray(np.ascontiguousarray(source))
+    return PIL.Image.open(source)
+
+# 📏 Upright RGB image with its long edge capped at max_side
+def normalize_image(image, max_side=MAX_IMAGE_SIDE):
+    if image.format == "JPEG":
+        # Let libjpeg decode at a reduced scale instead of full resolution
+        image.draft("RGB", (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    scale = max_side / float(max(image.size))
+    if scale < 1.0:
+        size = (round(image.width * scale), round(image.height * scale))
+        image = image.resize(size, PIL.Image.LANCZOS)
+    return image
+
+# 📦 Encoded blob for Gemini, built once and reused by every call for the image
+def encode_for_upload(image, fmt=UPLOAD_FORMAT, quality=UPLOAD_QUALITY):
+    fmt = "jpeg" if fmt == "jpg" else fmt
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt.upper(), quality=quality)
+    return {"mime_type": f"image/{fmt}", "data": buffer.getvalue()}
+
+# ✂️ Perspective-corrected card crop of a PIL image (None when no card is found)
+def crop_to_card(image):
+    card, found = localize_card(cv2.cvtColor(np.array(image.convert("RGB")), cv2.COLOR_RGB2BGR))
+    return PIL.Image.fromarray(cv2.cvtColor(card, cv2.COLOR_BGR2RGB)) if found else None
+
+# 🚚 Decode, normalize and encode once; small JPEG/WebP uploads are passed through untouched
+# unless `crop` finds a card to cut out of the frame
+def prepare_upload(source, crop=False):
+    image = load_image(source)
+    passthrough = isinstance(source, (bytes, bytearray)) and image.format in ("JPEG", "WEBP") \
+        and max(image.size) <= MAX_IMAGE_SIDE
+    if passthrough and not crop:
+        return {"mime_type": PIL.Image.MIME[image.format], "data": bytes(source)}
+
+    mime_type = PIL.Image.MIME.get(image.format)
+    image = normalize_image(image)
+    if crop:
+        card = crop_to_card(image)
+        if card is not None:
+            return encode_for_upload(card)
+        if passthrough:
+            return {"mime_type": mime_type, "data": bytes(source)}
+    return encode_for_upload(image)
+
+# 🤖 What the extractors hand to generate_content
+def model_input(source):
+    if isinstance(source, dict) and "mime_type" in source:
+        return source
+    return load_image(source)
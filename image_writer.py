@@ -0,0 +1,97 @@
+import hashlib
+import os
+import queue
+import random
+import threading
+
+from metrics import IMAGE_SAVE_DROPS
+
+# ⚙️ Persistence settings
+IMAGE_SAVE_DIR = os.getenv("IMAGE_SAVE_DIR", "saved_images")
+IMAGE_SAVE_FORMAT = os.getenv("IMAGE_SAVE_FORMAT", "webp").lower()  # webp / jpeg / png
+IMAGE_SAVE_QUALITY = int(os.getenv("IMAGE_SAVE_QUALITY", "80"))
+# all / failures / N% (e.g. 10%). N% samples successful requests and always keeps
+# failures, i.e. "failures" plus a sample of the rest
+IMAGE_SAVE_POLICY = os.getenv("IMAGE_SAVE_POLICY", "all")
+IMAGE_SAVE_QUEUE_SIZE = int(os.getenv("IMAGE_SAVE_QUEUE_SIZE", "64"))
+
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg", "jpg": "jpg", "png": "png"}
+
+_queue = queue.Queue(maxsize=IMAGE_SAVE_QUEUE_SIZE)
+_stats_lock = threading.Lock()
+_stats = {"queued": 0, "saved": 0, "skipped": 0, "dropped": 0, "errors": 0}
+_worker = None
+_worker_lock = threading.Lock()
+
+def _should_save(failed):
+    if IMAGE_SAVE_POLICY == "all":
+        return True
+    if IMAGE_SAVE_POLICY == "failures":
+        return failed
+    if IMAGE_SAVE_POLICY.endswith("%"):
+        return failed or random.random() * 100 < float(IMAGE_SAVE_POLICY[:-1])  # failures are never sampled away
+    return False
+
+def _write(prefix, image):
+    fmt = "jpeg" if IMAGE_SAVE_FORMAT == "jpg" else IMAGE_SAVE_FORMAT
+    digest = hashlib.sha256(image.tobytes()).hexdigest()[:16]
+    path = os.path.join(IMAGE_SAVE_DIR, f"{prefix}_{digest}.{EXTENSIONS[fmt]}")
+    if os.path.exists(path):
+        return path
+
+    if fmt == "png":
+        image.save(path, format="PNG")
+    else:
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(path, format=fmt.upper(), quality=IMAGE_SAVE_QUALITY)
+    return path
+
+def _run():
+    os.makedirs(IMAGE_SAVE_DIR, exist_ok=True)
+    while True:
+        prefix, image = _queue.get()
+        try:
+            _write(prefix, image)
+            with _stats_lock:
+                _stats["saved"] += 1
+        except Exception as e:
+            print(f"❌ Error saving image: {e}")
+            with _stats_lock:
+                _stats["errors"] += 1
+        finally:
+            _queue.task_done()
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="image-writer", daemon=True)
+            _worker.start()
+
+# 🖼️ Queue images (prefix -> PIL image) for saving; never blocks the request
+def save_images_async(images, failed=False):
+    if not _should_save(failed):
+        with _stats_lock:
+            _stats["skipped"] += len(images)
+        return
+
+    _ensure_worker()
+    for prefix, image in images.items():
+        if image is None:
+            continue
+        try:
+            _queue.put_nowait((prefix, image))
+            with _stats_lock:
+                _stats["queued"] += 1
+        except queue.Full:
+            with _stats_lock:
+                _stats["dropped"] += 1
+            IMAGE_SAVE_DROPS.inc()
+            print(f"⚠️ Image save queue full, dropped {prefix}")
+
+def get_image_writer_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["pending"] = _queue.qsize()
+    return stats
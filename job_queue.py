@@ -0,0 +1,230 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+from admission import Overloaded
+from metrics import JOBS, JOB_QUEUE_DEPTH
+
+# ⚙️ Durable job queue (SQLite file shared by every process on the host)
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.sqlite3")
+JOB_VISIBILITY_TIMEOUT = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "120"))  # claim lease, renewed while running
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "86400"))  # finished jobs kept this long
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "1000"))  # new jobs are refused (503) past this backlog; 0 = unlimited
+
+_local = threading.local()
+_running = {}  # job id -> claim token, for jobs this process is working on
+_running_lock = threading.Lock()
+
+# 💾 One SQLite connection per thread (WAL, so readers never block the workers)
+def _db():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(JOB_DB_PATH, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, kind TEXT, payload BLOB, options TEXT,"
+            " status TEXT, attempts INTEGER DEFAULT 0, claim_token TEXT,"
+            " visible_at REAL, created_at REAL, updated_at REAL, result TEXT, error TEXT)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, visible_at)")
+        _local.conn = conn
+    return conn
+
+def _queued_count():
+    count = _db().execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+    JOB_QUEUE_DEPTH.set(count)
+    return count
+
+def enqueue(kind, payload, options=None):
+    if JOB_MAX_QUEUED > 0 and _queued_count() >= JOB_MAX_QUEUED:
+        JOBS.inc(kind=kind, outcome="rejected")
+        raise Overloaded("Job queue is full", retry_after=30)
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    _db().execute(
+        "INSERT INTO jobs (id, kind, payload, options, status, visible_at, created_at, updated_at)"
+        " VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+        (job_id, kind, payload, json.dumps(options or {}), now, now, now)
+    )
+    JOBS.inc(kind=kind, outcome="enqueued")
+    return job_id
+
+# 🎟️ Lease the oldest visible job. A running job whose lease ran out (its worker
+# process died) is visible again, which is what makes delivery at-least-once.
+# A job that already used every attempt is failed instead of handed out again,
+# so a job that keeps crashing its worker cannot take the workers down forever.
+def claim():
+    conn = _db()
+    now = time.time()
+    token = uuid.uuid4().hex
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        expired = conn.execute(
+            "SELECT id, kind FROM jobs WHERE status = 'running' AND visible_at <= ? AND attempts >= ?",
+            (now, JOB_MAX_ATTEMPTS)
+        ).fetchall()
+        for job_id, _ in expired:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired', payload = NULL,"
+                " claim_token = NULL, visible_at = ?, updated_at = ? WHERE id = ?",
+                (now, now, job_id)
+            )
+        row = conn.execute(
+            "SELECT id, kind, payload, options, attempts FROM jobs"
+            " WHERE status IN ('queued', 'running') AND visible_at <= ?"
+            " ORDER BY created_at LIMIT 1", (now,)
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, claim_token = ?,"
+                " visible_at = ?, updated_at = ? WHERE id = ?",
+                (token, now + JOB_VISIBILITY_TIMEOUT, now, row[0])
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    for _, kind in expired:
+        JOBS.inc(kind=kind, outcome="failed")
+    if row is None:
+        return None
+    job_id, kind, payload, options, attempts = row
+    return {"id": job_id, "kind": kind, "payload": payload, "options": json.loads(options),
+            "attempts": attempts + 1, "token": token}
+
+def _finish(job, status, result=None, error=None, visible_at=None):
+    # Only the current lease holder may finish a job; a stale worker's write is dropped
+    now = time.time()
+    cursor = _db().execute(
+        "UPDATE jobs SET status = ?, result = ?, error = ?, visible_at = ?, updated_at = ?,"
+        " payload = CASE WHEN ? IN ('done', 'failed') THEN NULL ELSE payload END"
+        " WHERE id = ? AND claim_token = ?",
+        (status, json.dumps(result) if result is not None else None, error,
+         visible_at if visible_at is not None else now, now, status, job["id"], job["token"])
+    )
+    return cursor.rowcount == 1
+
+def complete(job, result):
+    if _finish(job, "done", result=result):
+        JOBS.inc(kind=job["kind"], outcome="done")
+
+# 🔁 Retry with jittered backoff until JOB_MAX_ATTEMPTS, then give up.
+# `final` fails at once (errors that no retry can fix, e.g. an invalid upload).
+def fail(job, error, final=False):
+    if final or job["attempts"] >= JOB_MAX_ATTEMPTS:
+        if _finish(job, "failed", error=error):
+            JOBS.inc(kind=job["kind"], outcome="failed")
+        return
+    delay = random.uniform(0, min(60.0, 2.0 ** job["attempts"]))
+    if _finish(job, "queued", error=error, visible_at=time.time() + delay):
+        JOBS.inc(kind=job["kind"], outcome="retried")
+
+# ⏳ Requeue after `retry_after` without using up an attempt (the server was busy, the job is fine)
+def defer(job, error, retry_after):
+    now = time.time()
+    cursor = _db().execute(
+        "UPDATE jobs SET status = 'queued', attempts = attempts - 1, error = ?, visible_at = ?, updated_at = ?"
+        " WHERE id = ? AND claim_token = ?",
+        (error, now + retry_after + random.uniform(0, 1.0), now, job["id"], job["token"])
+    )
+    if cursor.rowcount == 1:
+        JOBS.inc(kind=job["kind"], outcome="deferred")
+
+def get_job(job_id):
+    row = _db().execute(
+        "SELECT id, kind, status, attempts, created_at, updated_at, result, error FROM jobs WHERE id = ?",
+        (job_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    job = {"job_id": row[0], "kind": row[1], "status": row[2], "attempts": row[3],
+           "created_at": row[4], "updated_at": row[5]}
+    if row[6] is not None:
+        job["result"] = json.loads(row[6])
+    if row[7] is not None:
+        job["error"] = row[7]
+    return job
+
+def get_queue_stats():
+    rows = _db().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+    stats = {status: count for status, count in rows}
+    JOB_QUEUE_DEPTH.set(stats.get("queued", 0))
+    return stats
+
+def purge_finished():
+    _db().execute(
+        "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at <= ?",
+        (time.time() - JOB_RETENTION_SECONDS,)
+    )
+
+# 💓 Keep leases of long jobs (big PDFs) alive while this process works on them.
+# Leases are renewed for as long as the thread runs, so only a dead process
+# releases its jobs; a hung handler must be bounded by its own timeouts
+# (LLM_READ_TIMEOUT, STAGE_WAIT_TIMEOUT).
+def _heartbeat():
+    while True:
+        time.sleep(JOB_VISIBILITY_TIMEOUT / 3)
+        with _running_lock:
+            leases = list(_running.items())
+        for job_id, token in leases:
+            try:
+                _db().execute(
+                    "UPDATE jobs SET visible_at = ? WHERE id = ? AND claim_token = ? AND status = 'running'",
+                    (time.time() + JOB_VISIBILITY_TIMEOUT, job_id, token)
+                )
+            except sqlite3.Error as e:
+                print(f"⚠️ Job lease renewal failed: {e}")
+
+def _work(handlers, terminal):
+    last_purge = 0.0
+    while True:
+        try:
+            if time.time() - last_purge > 60:
+                purge_finished()
+                _queued_count()
+                last_purge = time.time()
+            job = claim()
+        except sqlite3.Error as e:
+            print(f"⚠️ Job queue unavailable: {e}")
+            job = None
+        if job is None:
+            time.sleep(JOB_POLL_INTERVAL)
+            continue
+
+        with _running_lock:
+            _running[job["id"]] = job["token"]
+        try:
+            complete(job, handlers[job["kind"]](job["payload"], job["options"]))
+        except Overloaded as e:
+            # 🚦 Shed by admission control / provider quota: back off, it was not the job's fault
+            print(f"⏳ Job {job['id']} ({job['kind']}) deferred: {e}")
+            defer(job, str(e), e.retry_after)
+        except terminal as e:
+            print(f"❌ Job {job['id']} ({job['kind']}) failed permanently: {e}")
+            fail(job, str(e), final=True)
+        except Exception as e:
+            print(f"❌ Job {job['id']} ({job['kind']}) attempt {job['attempts']} failed: {e}")
+            fail(job, str(e))
+        finally:
+            with _running_lock:
+                _running.pop(job["id"], None)
+
+_started = False
+
+# 👷 Background worker threads draining the queue; handlers: {kind: handler(payload, options) -> result}.
+# Exceptions of the `terminal` types fail the job without retrying.
+def start_workers(handlers, count, terminal=()):
+    global _started
+    if count <= 0 or _started:
+        return
+    _started = True
+    threading.Thread(target=_heartbeat, name="job-heartbeat", daemon=True).start()
+    for i in range(count):
+        threading.Thread(target=_work, args=(handlers, tuple(terminal)), name=f"job-worker-{i}", daemon=True).start()
@@ -0,0 +1,12 @@
+import os
+import threading
+
+# 👷 Dedicated job worker process: drains the job queue with the same pipeline as
+# app_v4 while the HTTP tier runs with JOB_WORKERS=0 (or a small number)
+os.environ.setdefault("JOB_WORKERS", "4")
+
+import app_v4  # starts JOB_WORKERS worker threads on import
+
+if __name__ == "__main__":
+    print(f"👷 Job worker running with {app_v4.JOB_WORKERS} threads")
+    threading.Event().wait()
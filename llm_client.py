@@ -0,0 +1,90 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ⚙️ Transport settings
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))  # seconds
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "20"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "16"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+# 🔌 One pooled keep-alive session per process
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=LLM_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+def _backoff(attempt):
+    # Full jitter exponential backoff
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+
+# 📮 POST with timeouts and bounded retries (429 Retry-After is honoured)
+def llm_post(url, headers=None, json=None, timeout=None):
+    timeout = timeout or (LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT)
+    session = get_session()
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        last_attempt = attempt == LLM_MAX_RETRIES
+        try:
+            response = session.post(url, headers=headers, json=json, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if last_attempt:
+                raise
+            print(f"⚠️ LLM request failed ({e.__class__.__name__}), retrying")
+            time.sleep(_backoff(attempt))
+            continue
+
+        if response.status_code in RETRY_STATUSES and not last_attempt:
+            delay = _retry_after(response)
+            delay = min(delay, LLM_BACKOFF_MAX) if delay is not None else _backoff(attempt)
+            print(f"⚠️ LLM returned {response.status_code}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        response.raise_for_status()
+        return response
+
+# 🔥 Open pooled connections at startup so the first request skips TCP+TLS setup
+def prewarm(urls, connections=2):
+    def _warm(url):
+        parts = urlsplit(url)
+        try:
+            get_session().head(f"{parts.scheme}://{parts.netloc}/", timeout=(LLM_CONNECT_TIMEOUT, 5))
+        except requests.RequestException as e:
+            print(f"⚠️ LLM prewarm failed for {parts.netloc}: {e}")
+
+    threads = [threading.Thread(target=_warm, args=(url,), daemon=True)
+               for url in urls for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    return threads
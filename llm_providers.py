@@ -0,0 +1,158 @@
+import io
+import json
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+from admission import estimate_tokens, rate_limiter
+from llm_client import llm_post
+import model_registry
+from metrics import LLM_SECONDS, LLM_ERRORS, JSON_PARSE_FAILURES, time_stage
+
+load_dotenv()
+
+# ⚙️ Provider selection: LLM_PROVIDER=stub sends every call site to the stub server
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "")
+STUB_LLM_URL = os.getenv("STUB_LLM_URL", "http://127.0.0.1:8099/v1/complete")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+LLAMA_MODEL = os.getenv("LLAMA_MODEL", "llama3-70b-8192")
+
+class LLMProvider:
+    """Text (and optionally image) in, model text out.
+
+    `task` names the call site (e.g. "classify", "pan"); the stub server uses it
+    to pick a canned response. Extra keyword arguments are generation settings.
+    """
+    name = "base"
+
+    @property
+    def quota_name(self):
+        return self.name
+
+    def complete(self, prompt, image=None, task="generic", **config):
+        # ⏳ Wait for provider quota (or raise Overloaded -> 429) before calling out
+        max_output = config.get("max_output_tokens") or config.get("max_tokens")
+        rate_limiter(self.quota_name).acquire(estimate_tokens(prompt, image, max_output))
+        start = time.perf_counter()
+        try:
+            return self._complete(prompt, image=image, task=task, **config)
+        except Exception:
+            LLM_ERRORS.inc(provider=self.name, task=task)
+            raise
+        finally:
+            LLM_SECONDS.observe(time.perf_counter() - start, provider=self.name, task=task)
+
+    def _complete(self, prompt, image=None, task="generic", **config):
+        raise NotImplementedError
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, model_name=GEMINI_MODEL):
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        self.genai = genai
+        self.model_name = model_name
+        self._models = {}
+        self._models_lock = threading.Lock()
+
+    # ♻️ One GenerativeModel per (model, generation config), reused across calls
+    def get_model(self, **config):
+        # config may hold dicts (response_schema), so the key is its canonical JSON
+        key = (self.model_name, json.dumps(config, sort_keys=True, default=str))
+        with time_stage("llm_setup"):
+            model = self._models.get(key)
+            if model is None:
+                with self._models_lock:
+                    model = self._models.get(key)
+                    if model is None:
+                        model = self.genai.GenerativeModel(
+                            self.model_name,
+                            generation_config=self.genai.types.GenerationConfig(**config)
+                        )
+                        self._models[key] = model
+        return model
+
+    def _complete(self, prompt, image=None, task="generic", **config):
+        model = self.get_model(**config)
+        contents = [image, prompt] if image is not None else [prompt]
+        response = model.generate_content(contents=contents)
+        return response.text
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+
+    def __init__(self, api_url=GROQ_API_URL, model_name=LLAMA_MODEL):
+        self.api_url = api_url
+        self.model_name = model_name
+        self.api_key = os.getenv("GROQ_API_KEY")
+
+    def _complete(self, prompt, image=None, task="generic", system=None, **config):
+        if image is not None:
+            raise ValueError("Groq provider does not accept images")
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        body = {"model": self.model_name, "messages": messages, **config}
+        response = llm_post(self.api_url, headers=headers, json=body)
+        return response.json()["choices"][0]["message"]["content"]
+
+class StubProvider(LLMProvider):
+    """Talks to stub_llm_server.py, which replays canned responses."""
+    name = "stub"
+
+    def __init__(self, url=STUB_LLM_URL, upstream="stub"):
+        self.url = url
+        self.upstream = upstream
+
+    @property
+    def quota_name(self):
+        return self.upstream  # stub traffic is limited like the provider it stands in for
+
+    def _complete(self, prompt, image=None, task="generic", **config):
+        body = {"provider": self.upstream, "task": task, "prompt": prompt, "image_bytes": _image_size(image)}
+        response = llm_post(self.url, json=body)
+        return response.json()["text"]
+
+# 📦 Upload size the real provider would receive. main.classify_image already hands
+# over the prepare_upload blob; only extractors called directly with a PIL image
+# are encoded here (as RGB, so RGBA / palette inputs work)
+def _image_size(image):
+    if image is None:
+        return 0
+    if isinstance(image, dict):
+        return len(image.get("data", b""))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    return len(buffer.getvalue())
+
+# 🧾 JSON from a model response (```json fences stripped); failures are counted and re-raised
+def parse_json_response(text, task):
+    raw_text = text.strip().strip("```json").strip("```").strip()
+    with time_stage("parse"):
+        try:
+            return json.loads(raw_text)
+        except json.JSONDecodeError:
+            JSON_PARSE_FAILURES.inc(task=task)
+            raise
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "groq": GroqProvider,
+}
+
+def build_provider(name):
+    if LLM_PROVIDER == "stub":
+        return StubProvider(upstream=name)
+    return PROVIDERS[name]()
+
+# 🔀 Provider for a call site ("gemini" / "groq"), built once per process through model_registry
+def get_provider(name):
+    return model_registry.get(name)
@@ -0,0 +1,158 @@
+import re
+from datetime import datetime
+
+# 🔢 Verhoeff tables (Aadhaar check digit)
+VERHOEFF_D = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
+    [1, 2, 3, 4, 0, 6, 7, 8, 9, 5],
+    [2, 3, 4, 0, 1, 7, 8, 9, 5, 6],
+    [3, 4, 0, 1, 2, 8, 9, 5, 6, 7],
+    [4, 0, 1, 2, 3, 9, 5, 6, 7, 8],
+    [5, 9, 8, 7, 6, 0, 4, 3, 2, 1],
+    [6, 5, 9, 8, 7, 1, 0, 4, 3, 2],
+    [7, 6, 5, 9, 8, 2, 1, 0, 4, 3],
+    [8, 7, 6, 5, 9, 3, 2, 1, 0, 4],
+    [9, 8, 7, 6, 5, 4, 3, 2, 1, 0],
+]
+VERHOEFF_P = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
+    [1, 5, 7, 6, 2, 8, 3, 0, 9, 4],
+    [5, 8, 0, 3, 7, 9, 6, 1, 4, 2],
+    [8, 9, 1, 6, 0, 4, 3, 5, 2, 7],
+    [9, 4, 5, 3, 1, 2, 6, 8, 7, 0],
+    [4, 2, 8, 6, 5, 7, 3, 9, 0, 1],
+    [2, 7, 9, 3, 8, 0, 6, 4, 1, 5],
+    [7, 0, 4, 6, 9, 1, 3, 2, 5, 8],
+]
+
+AADHAAR_PATTERN = re.compile(r"(?<![0-9])(?<![0-9][ \t])([2-9][0-9]{3})\s?([0-9]{4})\s?([0-9]{4})(?![ \t]?[0-9])")
+PAN_PATTERN = re.compile(r"\b([A-Z]{5}[0-9]{4}[A-Z])\b")
+UDYAM_PATTERN = re.compile(r"UDYAM-[A-Z]{2}-[0-9]{2}-[0-9]{7}")
+DATE_PATTERN = re.compile(r"([0-9]{2})[/-]([0-9]{2})[/-]([0-9]{4})")
+YEAR_PATTERN = re.compile(r"(?:YEAR OF BIRTH|YOB)\W*([0-9]{4})")
+NAME_PATTERN = re.compile(r"^[A-Za-z][A-Za-z .']{1,60}$")
+
+# Lines that look like names but are card furniture
+NON_NAME_WORDS = ("GOVERNMENT", "GOVT", "INDIA", "INCOME", "TAX", "DEPARTMENT", "AADHAAR",
+                  "DOB", "BIRTH", "MALE", "FEMALE", "SIGNATURE", "PERMANENT", "ACCOUNT",
+                  "NUMBER", "FATHER", "NAME", "CARD", "UNIQUE", "AUTHORITY")
+
+def verhoeff_valid(number):
+    if not number.isdigit():
+        return False
+    check = 0
+    for i, digit in enumerate(reversed(number)):
+        check = VERHOEFF_D[check][VERHOEFF_P[i % 8][int(digit)]]
+    return check == 0
+
+def is_valid_aadhaar(number):
+    return len(number) == 12 and number[0] not in "01" and verhoeff_valid(number)
+
+def is_valid_pan(number):
+    return bool(PAN_PATTERN.fullmatch(number))
+
+def is_valid_name(text):
+    words = text.upper().replace(".", " ").split()
+    return bool(NAME_PATTERN.match(text)) and not any(w in NON_NAME_WORDS for w in words)
+
+# 🧾 OCR lines in reading order (top-to-bottom, then left-to-right)
+def ordered_lines(ocr_results):
+    if not ocr_results:
+        return []
+    if isinstance(ocr_results[0], str):
+        return [line.strip() for line in ocr_results]
+    boxes = ocr_results[0] or []
+    boxes = sorted(boxes, key=lambda line: (round(line[0][0][1] / 10), line[0][0][0]))
+    return [line[1][0].strip() for line in boxes]
+
+def find_dob(lines):
+    for line in lines:
+        upper = line.upper()
+        match = DATE_PATTERN.search(upper)
+        if match:
+            day, month, year = match.groups()
+            try:
+                datetime(int(year), int(month), int(day))
+            except ValueError:
+                continue
+            return f"{day}/{month}/{year}", line
+        match = YEAR_PATTERN.search(upper)
+        if match:
+            return match.group(1), line
+    return None, None
+
+def is_valid_enterprise_name(text):
+    return len(text) > 2 and "UDYAM" not in text.upper() and not text.endswith(":")
+
+def find_name_after_label(lines, label, validator=is_valid_name):
+    for i, line in enumerate(lines):
+        upper = line.upper()
+        if label in upper and "FATHER" not in upper:
+            value = line.split(":", 1)[1].strip() if ":" in line else ""
+            if validator(value):
+                return value
+            if i + 1 < len(lines) and validator(lines[i + 1]):
+                return lines[i + 1]
+    return None
+
+def extract_aadhaar_fields(lines):
+    number = None
+    for match in AADHAAR_PATTERN.finditer("\n".join(lines)):
+        candidate = "".join(match.groups())
+        if is_valid_aadhaar(candidate):
+            number = candidate
+            break
+
+    dob, dob_line = find_dob(lines)
+    name = None
+    if dob_line is not None:
+        # Aadhaar prints the holder's name right above the DOB line
+        index = lines.index(dob_line)
+        for line in reversed(lines[max(index - 2, 0):index]):
+            if is_valid_name(line):
+                name = line
+                break
+
+    return {"Name": name, "DOB": dob, "Number": number}
+
+def extract_pan_fields(lines):
+    number = None
+    for line in lines:
+        match = PAN_PATTERN.search(line.replace(" ", "").upper())
+        if match and is_valid_pan(match.group(1)):
+            number = match.group(1)
+            break
+
+    dob, _ = find_dob(lines)
+    name = find_name_after_label(lines, "NAME")
+    if name is None:
+        # Older PAN layout: first name-like line under the header
+        for line in lines:
+            if is_valid_name(line):
+                name = line
+                break
+
+    return {"Name": name, "DOB": dob, "Number": number}
+
+def extract_udyam_fields(lines):
+    match = UDYAM_PATTERN.search("\n".join(lines).upper().replace(" ", ""))
+    number = match.group(0) if match else None
+    name = find_name_after_label(lines, "NAME OF ENTERPRISE", is_valid_enterprise_name)
+    return {"Name": name, "DOB": number, "Number": number}
+
+LOCAL_EXTRACTORS = {
+    "Aadhaar Card": extract_aadhaar_fields,
+    "PAN Card": extract_pan_fields,
+    "Udyam Certificate": extract_udyam_fields,
+}
+
+# ✅ Fields for the card, or None when any required field fails validation
+def extract_fields_from_ocr(card_type, ocr_results):
+    extractor = LOCAL_EXTRACTORS.get(card_type)
+    if extractor is None:
+        return None
+
+    fields = extractor(ordered_lines(ocr_results))
+    if any(value is None for value in fields.values()):
+        return None
+    return fields
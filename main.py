@@ -1,11 +1,95 @@
 from flask import Flask, request, jsonify
-from pan import extract_pan_details_from_image
-from udayam import extract_udayam_details_from_image
-from adhaar import extract_adhaar_details_from_image
-from card_classifier import classify_document_type_from_image
+from pan import extract_pan_details
+from udayam import extract_udayam_details
+from adhaar import extract_adhaar_details
+from card_classifier import classify_document_type
+from fused_extractor import extract_card_details, extract_card_details_from_text
+from image_utils import prepare_upload
+from result_cache import cache_key, get_cached, set_cached, get_cache_stats
+from metrics import register_metrics, time_stage, CARD_TYPES
+from model_registry import register_health
+from streaming import emit_fields, respond
+from admission import register_admission, stage_slot
 import os
 
 app = Flask(__name__)  # ✅ This is what Gunicorn needs
+register_metrics(app)  # 📈 /metrics
+register_health(app, required=("gemini",))  # 🩺 /healthz, /readyz
+register_admission(app)  # 🚦 429/503 + Retry-After under overload
+
+# ⚡ Fused mode: one Gemini call returns card type + fields
+FUSED_EXTRACTION = os.getenv("FUSED_EXTRACTION", "1") == "1"
+FUSED_MIN_CONFIDENCE = float(os.getenv("FUSED_MIN_CONFIDENCE", "0.8"))
+
+# ✂️ Send Gemini only the card (perspective-corrected) when one is found in an uploaded frame
+CLASSIFY_CROP_CARD = os.getenv("CLASSIFY_CROP_CARD", "1") == "1"
+
+EXTRACTORS = {
+    "Aadhaar Card": extract_adhaar_details,
+    "PAN Card": extract_pan_details,
+    "Udyam Certificate": extract_udayam_details,
+}
+
+# 🐢 Two-call flow: classify first, then run the card's extractor
+def classify_then_extract(image, on_card_type=None):
+    with stage_slot("classify"), time_stage("classify"):
+        card_type = classify_document_type(image)
+
+    extractor = EXTRACTORS.get(card_type)
+    if extractor is None:
+        return None
+    if on_card_type:
+        on_card_type(card_type)  # 📡 known before the extraction call finishes
+    with stage_slot("extract"), time_stage("extract"):
+        data = extractor(image)
+    return {
+        "card_type": card_type,
+        "data": data
+    }
+
+# 🔥 Classification + extraction for one image (None for unknown cards)
+# `image` may be a path, bytes, a PIL image or an ndarray; it is decoded,
+# downscaled and encoded once, and the same upload blob feeds every Gemini call
+def classify_image(image, card_type=None, crop=False, on_card_type=None):
+    image = prepare_upload(image, crop=crop)
+
+    # Card type already known (e.g. from the local OCR classifier)
+    if card_type in EXTRACTORS:
+        with stage_slot("extract"), time_stage("extract"):
+            data = EXTRACTORS[card_type](image)
+        return {
+            "card_type": card_type,
+            "data": data
+        }
+
+    if FUSED_EXTRACTION:
+        with stage_slot("extract"), time_stage("classify_extract"):
+            fused = extract_card_details(image)
+        if fused["card_type"] in EXTRACTORS and fused["confidence"] >= FUSED_MIN_CONFIDENCE:
+            return {
+                "card_type": fused["card_type"],
+                "data": fused["data"]
+            }
+        print("⚠️ Fused extraction not confident, falling back to two calls")
+
+    return classify_then_extract(image, on_card_type)
+
+# 📝 Classification + extraction from document text (no image), e.g. a PDF text layer
+def classify_text(text):
+    with stage_slot("extract"), time_stage("classify_extract"):
+        fused = extract_card_details_from_text(text)
+    if "error" in fused:
+        raise RuntimeError(fused["error"])
+    if fused["card_type"] not in EXTRACTORS:
+        return None
+    return {
+        "card_type": fused["card_type"],
+        "data": fused["data"]
+    }
+
+# 🚫 Extractors report failures inside the field values
+def has_extraction_error(result):
+    return any(str(value).startswith("Error") for value in result.get("data", {}).values())
 
 @app.route("/classify", methods=["POST"])
 def classify():
@@ -16,26 +100,29 @@ def classify():
     if file.filename == "":
         return jsonify({"error": "No selected file"}), 400
 
-    file_path = f"temp_{file.filename}"
-    file.save(file_path)
+    image_bytes = file.read()
 
-    try:
-        card_type = classify_document_type_from_image(file_path)
-        print("card type========>", card_type)
+    # 📡 ?stream=ndjson|sse sends accepted / card_type / field events before the result
+    def run(emit):
+        key = cache_key(image_bytes, "classify")
+        cached = get_cached(key)
+        if cached is not None:
+            return cached, 200
 
-        if card_type == "Aadhaar Card":
-            result = extract_adhaar_details_from_image(file_path)
-        elif card_type == "PAN Card":
-            result = extract_pan_details_from_image(file_path)
-        elif card_type == "Udyam Certificate":
-            result = extract_udayam_details_from_image(file_path)
-        else:
-            return jsonify({"error": "Invalid Card Type"}), 400
+        emit({"event": "accepted", "bytes": len(image_bytes)})
+        result = classify_image(image_bytes, crop=CLASSIFY_CROP_CARD,
+                                on_card_type=lambda card_type: emit({"event": "card_type", "card_type": card_type}))
+        CARD_TYPES.inc(card_type=result["card_type"] if result else "Unknown")
+        if result is None:
+            return {"error": "Invalid Card Type"}, 400
 
-        return jsonify({
-            "card_type": card_type,
-            "data": result
-        })
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        emit_fields(emit, result)
+        if not has_extraction_error(result):
+            set_cached(key, result)
+        return result, 200
+
+    return respond(run, "classify")
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(get_cache_stats())
@@ -0,0 +1,158 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, request
+
+# 📈 Minimal Prometheus text-format metrics (per process; no external dependency)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry = []
+_lock = threading.Lock()
+
+def _label_text(labelnames, values):
+    if not labelnames:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(labelnames, values))
+    return "{" + pairs + "}"
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def samples(self):
+        with _lock:
+            return [(self.name, key, value) for key, value in self.values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, key, value in self.samples():
+            lines.append(f"{name}{_label_text(self.labelnames, key)} {value}")
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with _lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            entry = self.values.setdefault(key, {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][i] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with _lock:
+            items = [(key, dict(entry, counts=list(entry["counts"]))) for key, entry in self.values.items()]
+        for key, entry in items:
+            for bound, count in zip(self.buckets, entry["counts"]):
+                labels = _label_text(self.labelnames + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _label_text(self.labelnames + ("le",), key + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {entry['count']}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {entry['sum']}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {entry['count']}")
+        return lines
+
+# 📊 Pipeline metrics
+STAGE_SECONDS = Histogram("kyc_stage_seconds", "Time spent per pipeline stage", ["stage"])
+REQUEST_SECONDS = Histogram("kyc_request_seconds", "HTTP request latency", ["endpoint", "status"])
+IN_FLIGHT = Gauge("kyc_requests_in_flight", "Requests currently being served")
+CARD_TYPES = Counter("kyc_card_types_total", "Documents by detected card type", ["card_type"])
+LLM_SECONDS = Histogram("kyc_llm_seconds", "LLM call latency", ["provider", "task"])
+LLM_ERRORS = Counter("kyc_llm_errors_total", "Failed LLM calls", ["provider", "task"])
+JSON_PARSE_FAILURES = Counter("kyc_json_parse_failures_total", "LLM responses that were not valid JSON", ["task"])
+CACHE_LOOKUPS = Counter("kyc_cache_lookups_total", "Result cache lookups", ["result"])
+CLASSIFIER_FALLBACKS = Counter("kyc_classifier_fallbacks_total", "Local classifications handed to the LLM")
+IMAGE_SAVE_DROPS = Counter("kyc_image_save_dropped_total", "Images dropped because the save queue was full")
+CARD_LOCALIZATIONS = Counter("kyc_card_localizations_total", "Card localization outcomes", ["result"])
+JOBS = Counter("kyc_jobs_total", "Asynchronous jobs by outcome", ["kind", "outcome"])
+JOB_QUEUE_DEPTH = Gauge("kyc_job_queue_depth", "Jobs waiting in the durable queue")
+STAGE_QUEUE_DEPTH = Gauge("kyc_stage_queue_depth", "Callers waiting for a stage slot", ["stage"])
+STAGE_ACTIVE = Gauge("kyc_stage_active", "Calls currently holding a stage slot", ["stage"])
+ADMISSION_REJECTIONS = Counter("kyc_admission_rejections_total", "Requests shed by admission control", ["stage", "reason"])
+LLM_RATE_WAIT = Histogram("kyc_llm_rate_wait_seconds", "Time spent waiting for provider quota", ["provider"])
+FIRST_USEFUL_SECONDS = Histogram("kyc_first_useful_byte_seconds",
+                                 "Time until the first useful result (card type / field) is sent", ["endpoint", "mode"])
+
+def time_stage(stage):
+    return STAGE_SECONDS.time(stage=stage)
+
+def render_metrics():
+    lines = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# 🔌 /metrics plus in-flight and latency tracking for a Flask app
+def register_metrics(app):
+    @app.before_request
+    def _start_timer():
+        request.environ["metrics.start"] = time.perf_counter()
+        IN_FLIGHT.inc()
+
+    @app.after_request
+    def _observe(response):
+        start = request.environ.get("metrics.start")
+        if start is not None:
+            REQUEST_SECONDS.observe(time.perf_counter() - start,
+                                    endpoint=request.endpoint or "unknown", status=response.status_code)
+        return response
+
+    @app.teardown_request
+    def _finish(exc):
+        if request.environ.pop("metrics.start", None) is not None:
+            IN_FLIGHT.dec()
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+    return app
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+
+from flask import jsonify
+
+# ⚙️ WARMUP_ON_START=1 loads (and exercises) an app's models in the background at
+# startup; /readyz stays 503 until that finishes so traffic waits for warm workers
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "0") == "1"
+WARMUP_IMAGE = os.getenv("WARMUP_IMAGE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "pan_dummy_3.jpg"))
+
+_loaders = {}
+_warmers = {}
+_instances = {}
+_status = {}  # name -> {"state": cold/loading/ready/failed, "seconds": ..., "error": ...}
+_lock = threading.Lock()
+_load_locks = {}
+
+# loader() builds the model; warm(model), if given, exercises it during warm-up only
+def register(name, loader, warm=None):
+    with _lock:
+        _loaders[name] = loader
+        if warm is not None:
+            _warmers[name] = warm
+        _status.setdefault(name, {"state": "cold"})
+        _load_locks.setdefault(name, threading.Lock())
+
+# 💤 Load on first use, once per process. Every call site loads its model through
+# here (ocr_pool, llm_providers.get_provider), so /healthz shows the real state
+def get(name):
+    if name in _instances:
+        return _instances[name]
+    with _load_locks[name]:
+        if name not in _instances:
+            _status[name] = {"state": "loading"}
+            start = time.perf_counter()
+            try:
+                _instances[name] = _loaders[name]()
+            except Exception as e:
+                _status[name] = {"state": "failed", "error": str(e)}
+                raise
+            _status[name] = {"state": "ready", "seconds": round(time.perf_counter() - start, 3)}
+    return _instances[name]
+
+def is_ready(names):
+    return all(_status.get(name, {}).get("state") == "ready" for name in names)
+
+def status():
+    with _lock:
+        return {name: dict(entry) for name, entry in _status.items()}
+
+def warm_up(names):
+    for name in names:
+        try:
+            model = get(name)
+            if name in _warmers:
+                _warmers[name](model)
+        except Exception as e:
+            print(f"❌ Warm-up failed for {name}: {e}")
+
+# 🩺 /healthz (process is up) and /readyz (required models loaded)
+def register_health(app, required=()):
+    required = tuple(required)
+    if WARMUP_ON_START and required:
+        threading.Thread(target=warm_up, args=(required,), name="warm-up", daemon=True).start()
+
+    @app.route("/healthz", methods=["GET"])
+    def healthz():
+        return jsonify({"status": "ok"})
+
+    @app.route("/readyz", methods=["GET"])
+    def readyz():
+        # Without start-up warm-up models load lazily on first use: ready unless one failed to load
+        if WARMUP_ON_START:
+            ready = is_ready(required)
+        else:
+            ready = not any(_status.get(name, {}).get("state") == "failed" for name in required)
+        return jsonify({"ready": ready, "models": status()}), 200 if ready else 503
+
+    return app
+
+# 📦 Models used by the apps
+def _load_ocr():
+    import ocr_pool
+    return ocr_pool.load_model()  # OCR process pool, or the in-process PaddleOCR
+
+def _warm_ocr(model):
+    import cv2
+    import ocr_pool
+    ocr_pool.warm_up(cv2.imread(WARMUP_IMAGE))  # starts every OCR process and runs one inference
+
+def _provider_loader(name):
+    def load():
+        from llm_providers import build_provider
+        return build_provider(name)
+    return load
+
+def _warm_groq(provider):
+    from llm_client import prewarm
+    from llm_providers import GROQ_API_URL
+    prewarm([GROQ_API_URL])
+
+register("ocr", _load_ocr, warm=_warm_ocr)
+register("gemini", _provider_loader("gemini"))
+register("groq", _provider_loader("groq"), warm=_warm_groq)
@@ -0,0 +1,94 @@
+import os
+import re
+import threading
+
+from metrics import CLASSIFIER_FALLBACKS
+
+# 🎚️ Below this confidence we let Gemini classify the document
+OCR_CLASSIFIER_THRESHOLD = float(os.getenv("OCR_CLASSIFIER_THRESHOLD", "0.75"))
+
+PAN_PATTERN = re.compile(r"\b[A-Z]{5}[0-9]{4}[A-Z]\b")
+AADHAAR_PATTERN = re.compile(r"(?<![0-9])(?<![0-9][ \t])[2-9][0-9]{3}\s?[0-9]{4}\s?[0-9]{4}(?![ \t]?[0-9])")
+UDYAM_PATTERN = re.compile(r"UDYAM-[A-Z]{2}-[0-9]{2}-[0-9]{7}")
+
+# (pattern or keyword, weight) anchors per card type
+ANCHORS = {
+    "PAN Card": [
+        (PAN_PATTERN, 0.6),
+        ("INCOME TAX DEPARTMENT", 0.5),
+        ("PERMANENT ACCOUNT NUMBER", 0.5),
+    ],
+    "Aadhaar Card": [
+        (AADHAAR_PATTERN, 0.5),
+        ("AADHAAR", 0.5),
+        ("UNIQUE IDENTIFICATION AUTHORITY", 0.5),
+        ("VID", 0.2),
+        ("GOVERNMENT OF INDIA", 0.2),
+    ],
+    "Udyam Certificate": [
+        (UDYAM_PATTERN, 0.7),
+        ("UDYAM REGISTRATION", 0.5),
+        ("MINISTRY OF MICRO", 0.4),
+        ("MSME", 0.3),
+    ],
+}
+
+# 📊 How often the local classifier had to hand over to Gemini
+_stats_lock = threading.Lock()
+_stats = {"total": 0, "fallback": 0}
+
+# 🧾 Text lines from a PaddleOCR result (or a plain list of lines)
+def ocr_lines(ocr_results):
+    if not ocr_results:
+        return []
+    if isinstance(ocr_results[0], str):
+        return list(ocr_results)
+    return [line[1][0] for line in (ocr_results[0] or [])]
+
+def classify_document_type_from_ocr(ocr_results):
+    text = "\n".join(ocr_lines(ocr_results)).upper()
+    if not text.strip():
+        return "Unknown", 0.0
+
+    scores = {}
+    for card_type, anchors in ANCHORS.items():
+        score = 0.0
+        for anchor, weight in anchors:
+            # Keywords must be whole words: "VID" must not match "PROVIDED" / "DAVID"
+            found = (anchor if hasattr(anchor, "search") else re.compile(rf"\b{re.escape(anchor)}\b")).search(text)
+            if found:
+                score += weight
+        scores[card_type] = min(score, 1.0)
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), (_, second_score) = ranked[0], ranked[1]
+    if best_score == 0:
+        return "Unknown", 0.0
+
+    # Confidence drops when another card type matches as well
+    return best, round(max(best_score - second_score, 0.0), 2)
+
+# 🔀 Local label when confident, else None so the caller asks Gemini
+def local_card_type(ocr_results, threshold=None):
+    threshold = OCR_CLASSIFIER_THRESHOLD if threshold is None else threshold
+    card_type, confidence = classify_document_type_from_ocr(ocr_results)
+    confident = card_type != "Unknown" and confidence >= threshold
+
+    with _stats_lock:
+        _stats["total"] += 1
+        if not confident:
+            _stats["fallback"] += 1
+    if not confident:
+        CLASSIFIER_FALLBACKS.inc()
+
+    return card_type if confident else None
+
+def get_classifier_stats():
+    with _stats_lock:
+        total, fallback = _stats["total"], _stats["fallback"]
+    return {
+        "total": total,
+        "fallback": fallback,
+        "fallback_rate": round(fallback / total, 4) if total else 0.0,
+        "threshold": OCR_CLASSIFIER_THRESHOLD
+    }
@@ -0,0 +1,113 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import model_registry
+from admission import acquire_stage
+
+# ⚙️ OCR_POOL_SIZE=0 runs PaddleOCR inside the HTTP worker (previous behaviour).
+# With a pool, run the HTTP tier as one gunicorn process with many threads
+# (gthread) for the LLM waits; OCR scales separately with OCR_POOL_SIZE.
+OCR_POOL_SIZE = int(os.getenv("OCR_POOL_SIZE", "0"))
+OCR_WORKER_THREADS = int(os.getenv("OCR_WORKER_THREADS", "2"))  # CPU threads per OCR process
+
+_pool = None
+_local_ocr_lock = threading.Lock()  # the in-process PaddleOCR is not thread-safe
+
+def _build_model(threads):
+    from paddleocr import PaddleOCR
+    return PaddleOCR(use_angle_cls=True, lang='en', det_db_box_thresh=0.5, cpu_threads=threads)
+
+# 👷 Worker process side: one PaddleOCR per process, pixels read from shared memory
+_worker_model = None
+
+def _init_worker(threads):
+    global _worker_model
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    _worker_model = _build_model(threads)
+
+def _ocr_shared(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    image = None
+    try:
+        image = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        return _worker_model.ocr(image, cls=True)
+    finally:
+        image = None  # drop the view before closing the segment
+        shm.close()
+
+# 🏊 HTTP worker side: the pool (or local model) is loaded once through model_registry ("ocr")
+def load_model():
+    global _pool
+    if OCR_POOL_SIZE <= 0:
+        return _build_model(OCR_WORKER_THREADS)
+    _pool = ProcessPoolExecutor(
+        max_workers=OCR_POOL_SIZE,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(OCR_WORKER_THREADS,)
+    )
+    return _pool
+
+def _get_pool():
+    return model_registry.get("ocr")
+
+def _get_local_model():
+    return model_registry.get("ocr")
+
+# 🧾 Future with PaddleOCR results for an OpenCV (BGR) image
+# 🚦 Holds an "ocr" stage slot until the result is in (raises Overloaded when the line is full)
+def submit_ocr(opencv_img):
+    release_slot = acquire_stage("ocr")
+    if OCR_POOL_SIZE <= 0:
+        future = Future()
+        try:
+            model = _get_local_model()
+            with _local_ocr_lock:
+                future.set_result(model.ocr(opencv_img, cls=True))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            release_slot()
+        return future
+
+    try:
+        image = np.ascontiguousarray(opencv_img)
+        shm = shared_memory.SharedMemory(create=True, size=image.nbytes)
+    except Exception:
+        release_slot()
+        raise
+    np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)[:] = image
+
+    def _release(_):
+        shm.close()
+        shm.unlink()
+        release_slot()
+
+    try:
+        future = _get_pool().submit(_ocr_shared, shm.name, image.shape, image.dtype.str)
+    except Exception:
+        _release(None)
+        raise
+    future.add_done_callback(_release)
+    return future
+
+def run_ocr(opencv_img):
+    return submit_ocr(opencv_img).result()
+
+def warm_up(image=None):
+    """Start every OCR process (or the local model) before traffic arrives."""
+    image = image if image is not None else np.full((64, 256, 3), 255, dtype=np.uint8)
+    workers = max(OCR_POOL_SIZE, 1)
+    for future in [submit_ocr(image) for _ in range(workers)]:
+        future.result()
+
+@atexit.register
+def _shutdown():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
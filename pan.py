@@ -1,15 +1,10 @@
-import google.generativeai as genai
-from dotenv import load_dotenv
-import os
-import PIL.Image
-import json
+from image_utils import model_input
+from admission import Overloaded
+from llm_providers import get_provider, parse_json_response
 
-load_dotenv()
-GOOGLE_API = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API)
 
 # Define the function
-def extract_pan_details_from_image(image_path: str) -> dict:
+def extract_pan_details(image) -> dict:
     prompt = """
     **Knowledge**
     - PAN Numbers are 10-character alphanumeric identifiers (not 12-digit numbers like Aadhaar)
@@ -49,25 +44,24 @@ def extract_pan_details_from_image(image_path: str) -> dict:
     """
     
     try:
-        # Load the image
-        image = PIL.Image.open(image_path)
+        # Accept a path, bytes, PIL image, ndarray or an encoded upload blob
+        image = model_input(image)
 
-        # Generate content
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        response = model.generate_content(
-            contents=[image, prompt],
-            generation_config=genai.types.GenerationConfig(temperature=0)
-        )
+        # Generate content through the configured provider
+        text = get_provider("gemini").complete(prompt, image=image, task="pan", temperature=0)
 
-        # Extract text and clean it
-        raw_text = response.text.strip().strip("```json").strip("```").strip()
-        
         # Parse and return JSON
-        return json.loads(raw_text)
+        return parse_json_response(text, "pan")
     
+    except Overloaded:
+        raise  # 🚦 shed load instead of reporting a failed extraction
     except Exception as e:
         return {
             "Name": "Error",
             "DOB": "Error",
             "PAN_Number": f"Error: {str(e)}"
         }
+
+# 📂 Path-based entry point
+def extract_pan_details_from_image(image_path: str) -> dict:
+    return extract_pan_details(image_path)
@@ -0,0 +1,102 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import PIL.Image
+
+from image_utils import MAX_IMAGE_SIDE
+from metrics import time_stage
+from uploads import UploadError
+
+# ⚙️ PDF ingestion limits
+PDF_DPI = int(os.getenv("PDF_DPI", "200"))  # pages are also capped at MAX_IMAGE_SIDE
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_PAGE_CONCURRENCY = int(os.getenv("PDF_PAGE_CONCURRENCY", "4"))  # pages rasterized / in flight at once
+PDF_MIN_TEXT_CHARS = int(os.getenv("PDF_MIN_TEXT_CHARS", "40"))  # less embedded text than this -> render + OCR
+
+# pymupdf is imported on first use so importing the apps stays cheap
+def open_pdf(pdf_bytes):
+    import pymupdf
+    try:
+        document = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+    except Exception as e:
+        raise UploadError(f"Invalid PDF: {str(e)}")
+    if document.needs_pass:
+        document.close()
+        raise UploadError("Encrypted PDFs are not supported")
+    return document
+
+# ✅ Cheap up-front check (opens, not encrypted, within PDF_MAX_PAGES); raises UploadError
+def check_pdf(pdf_bytes, max_pages=PDF_MAX_PAGES):
+    document = open_pdf(pdf_bytes)
+    try:
+        if document.page_count > max_pages:
+            raise UploadError(f"PDF limited to {max_pages} pages", 413)
+    finally:
+        document.close()
+
+# 📝 Embedded text lines with their positions, shaped like a PaddleOCR result
+# ([[box, (text, confidence)], ...] for one page) so the OCR classifiers/extractors apply as is
+def page_text_lines(page):
+    import pymupdf
+    lines = []
+    with time_stage("text_layer"):
+        for block in page.get_text("dict", flags=pymupdf.TEXT_PRESERVE_WHITESPACE)["blocks"]:
+            for line in block.get("lines", []):
+                text = " ".join("".join(span["text"] for span in line["spans"]).split())
+                if text:
+                    x0, y0, x1, y1 = line["bbox"]
+                    lines.append([[[x0, y0], [x1, y0], [x1, y1], [x0, y1]], (text, 1.0)])
+    return [lines]
+
+def has_usable_text(text_lines):
+    return sum(ch.isalnum() for _, (text, _) in text_lines[0] for ch in text) >= PDF_MIN_TEXT_CHARS
+
+# 🖨️ One page as an RGB PIL image at `dpi`, long side capped at MAX_IMAGE_SIDE
+def render_page(page, dpi=PDF_DPI, max_side=MAX_IMAGE_SIDE):
+    import pymupdf
+    zoom = min(dpi / 72.0, max_side / max(page.rect.width, page.rect.height))
+    with time_stage("rasterize"):
+        pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), colorspace=pymupdf.csRGB, alpha=False)
+        image = PIL.Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+    # MuPDF otherwise keeps every decoded scan in its resource store (256 MB by default)
+    pymupdf.TOOLS.store_shrink(100)
+    return image
+
+# 📄 handle_page(index, image) over every page, in parallel. A page is only rasterized
+# once a slot is free, so at most `concurrency` page images exist whatever the page count.
+# With `handle_text`, pages carrying a usable text layer go to handle_text(index, text_lines)
+# instead and are never rendered or OCRed.
+# Returns one item per page: the handler's result, or the exception it raised.
+def map_pages(pdf_bytes, handle_page, handle_text=None, concurrency=PDF_PAGE_CONCURRENCY,
+              max_pages=PDF_MAX_PAGES):
+    document = open_pdf(pdf_bytes)
+    try:
+        if document.page_count > max_pages:
+            raise UploadError(f"PDF limited to {max_pages} pages", 413)
+
+        slots = threading.BoundedSemaphore(concurrency)
+        futures = []
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for index in range(document.page_count):
+                slots.acquire()
+                try:
+                    # PyMuPDF documents are not thread-safe: pages are read here, in order
+                    page = document[index]
+                    text_lines = page_text_lines(page) if handle_text else None
+                    if text_lines and has_usable_text(text_lines):
+                        future = pool.submit(handle_text, index, text_lines)
+                    else:
+                        image = render_page(page)
+                        future = pool.submit(handle_page, index, image)
+                except Exception as e:
+                    slots.release()
+                    futures.append(e)
+                    continue
+                future.add_done_callback(lambda _: slots.release())
+                futures.append(future)
+                page = image = None
+
+        return [item if isinstance(item, Exception) else (item.exception() or item.result()) for item in futures]
+    finally:
+        document.close()
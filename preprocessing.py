@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+import cv2
+import numpy as np
+from PIL import Image
+from card_localizer import localize_card
+from deskew import deskew
+from metrics import STAGE_SECONDS, time_stage
+
+SHARPEN_KERNEL = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])
+
+def _gray(img):
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+
+# 🧱 Stages: OpenCV ndarray (BGR or gray) in, ndarray out
+def stage_crop(img):
+    return localize_card(img)[0]
+
+def stage_deskew(img):
+    return deskew(img)[0]
+
+# CLAHE only sharpens the skew estimate; the rotation applies to the original pixels
+def stage_clahe_deskew(img):
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    return deskew(img, clahe.apply(_gray(img)))[0]
+
+def stage_bilateral(img):
+    return cv2.bilateralFilter(img, d=9, sigmaColor=75, sigmaSpace=75)
+
+def stage_threshold(img):
+    return cv2.adaptiveThreshold(_gray(img), 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                 cv2.THRESH_BINARY, 11, 3)
+
+def stage_blur(img):
+    return cv2.GaussianBlur(img, (5, 5), 0)
+
+def stage_sharpen(img):
+    return cv2.filter2D(img, -1, SHARPEN_KERNEL)
+
+STAGES = {
+    "crop": stage_crop,
+    "deskew": stage_deskew,
+    "clahe_deskew": stage_clahe_deskew,
+    "bilateral": stage_bilateral,
+    "threshold": stage_threshold,
+    "blur": stage_blur,
+    "sharpen": stage_sharpen,
+}
+
+# 🎛️ Named profiles (speed vs quality)
+PROFILES = {
+    "none": [],
+    "fast": ["crop", "deskew", "threshold"],
+    "default": ["crop", "deskew", "threshold", "blur", "sharpen"],  # app.py chain
+    "accurate": ["crop", "clahe_deskew", "bilateral", "threshold", "sharpen"],  # app_v1.py chain
+}
+
+DEFAULT_PROFILE = os.getenv("PREPROCESS_PROFILE", "default")
+
+# Per card type overrides, e.g. PREPROCESS_CARD_PROFILES="PAN Card=fast,Udyam Certificate=none"
+CARD_TYPE_PROFILES = dict(
+    item.split("=", 1) for item in os.getenv("PREPROCESS_CARD_PROFILES", "").split(",") if "=" in item
+)
+
+# ⏱️ Per-stage timing totals (/preprocess/stats) + kyc_stage_seconds{stage="preprocess_<name>"} in every app
+_stats_lock = threading.Lock()
+_stage_stats = {}
+
+def _record(stage, elapsed_ms):
+    STAGE_SECONDS.observe(elapsed_ms / 1000, stage=f"preprocess_{stage}")
+    with _stats_lock:
+        entry = _stage_stats.setdefault(stage, {"count": 0, "total_ms": 0.0})
+        entry["count"] += 1
+        entry["total_ms"] += elapsed_ms
+
+def resolve_profile(requested=None, card_type=None):
+    if requested in PROFILES:
+        return requested
+    if card_type in CARD_TYPE_PROFILES and CARD_TYPE_PROFILES[card_type] in PROFILES:
+        return CARD_TYPE_PROFILES[card_type]
+    return DEFAULT_PROFILE
+
+# 🧪 Run a profile over a PIL image; returns (PIL image, {stage: ms})
+def run_pipeline(image, profile=None):
+    stages = PROFILES[profile or DEFAULT_PROFILE]
+    timings = {}
+    if not stages:
+        return image, timings
+
+    with time_stage("preprocess"):
+        img = cv2.cvtColor(np.array(image.convert("RGB")), cv2.COLOR_RGB2BGR)
+        for name in stages:
+            start = time.perf_counter()
+            img = STAGES[name](img)
+            timings[name] = (time.perf_counter() - start) * 1000
+            _record(name, timings[name])
+
+    if img.ndim == 2:
+        return Image.fromarray(cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)), timings
+    return Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB)), timings
+
+def get_stage_stats():
+    with _stats_lock:
+        return {
+            stage: {
+                "count": entry["count"],
+                "avg_ms": round(entry["total_ms"] / entry["count"], 2)
+            }
+            for stage, entry in _stage_stats.items()
+        }
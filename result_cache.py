@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import CACHE_LOOKUPS
+
+# ⚙️ Cache settings
+PIPELINE_VERSION = os.getenv("PIPELINE_VERSION", "1")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "86400"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "result_cache.sqlite3")
+
+_lock = threading.Lock()
+_memory = OrderedDict()  # key -> (expires_at, value)
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+_local = threading.local()
+
+# 🔑 Hash of the decoded image bytes + pipeline/prompt version
+def cache_key(image_bytes, namespace):
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    return f"{namespace}:{PIPELINE_VERSION}:{digest}"
+
+# 💾 One SQLite connection per thread, shared file across gunicorn workers
+def _db():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(CACHE_DB_PATH, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+        )
+        _local.conn = conn
+    return conn
+
+def _remember(key, value, expires_at):
+    with _lock:
+        _memory[key] = (expires_at, value)
+        _memory.move_to_end(key)
+        while len(_memory) > CACHE_MAX_ENTRIES:
+            _memory.popitem(last=False)
+
+def get_cached(key):
+    now = time.time()
+    with _lock:
+        entry = _memory.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                _memory.move_to_end(key)
+                _stats["memory_hits"] += 1
+                CACHE_LOOKUPS.inc(result="memory_hit")
+                return entry[1]
+            del _memory[key]
+
+    try:
+        row = _db().execute(
+            "SELECT value, expires_at FROM results WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+    except sqlite3.Error as e:
+        print(f"⚠️ Cache read failed: {e}")
+        row = None
+
+    if row is None:
+        with _lock:
+            _stats["misses"] += 1
+        CACHE_LOOKUPS.inc(result="miss")
+        return None
+
+    value = json.loads(row[0])
+    _remember(key, value, row[1])
+    with _lock:
+        _stats["disk_hits"] += 1
+    CACHE_LOOKUPS.inc(result="disk_hit")
+    return value
+
+def set_cached(key, value):
+    expires_at = time.time() + CACHE_TTL_SECONDS
+    _remember(key, value, expires_at)
+    try:
+        conn = _db()
+        conn.execute(
+            "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), expires_at)
+        )
+        conn.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"⚠️ Cache write failed: {e}")
+
+def get_cache_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["memory_entries"] = len(_memory)
+    lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+    stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+    return stats
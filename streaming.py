@@ -0,0 +1,98 @@
+import json
+import queue
+import threading
+import time
+
+from flask import Response, jsonify, request
+
+from admission import Overloaded, take_admission_slot
+from metrics import FIRST_USEFUL_SECONDS
+
+# 📡 Opt-in streaming: ?stream=ndjson|sse (or Accept: application/x-ndjson / text/event-stream)
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+USEFUL_EVENTS = ("card_type", "field", "result")
+
+class StreamCancelled(Exception):
+    """Raised from emit() once the client has gone away, to stop the pipeline early."""
+
+def requested_stream_format():
+    fmt = request.args.get("stream")
+    if fmt in STREAM_FORMATS:
+        return fmt
+    if fmt in ("1", "true"):
+        return "ndjson"
+    best = request.accept_mimetypes.best_match(["application/json", *STREAM_FORMATS.values()])
+    for fmt, mimetype in STREAM_FORMATS.items():
+        if best == mimetype:
+            return fmt
+    return None
+
+def _encode(event, fmt):
+    if fmt == "sse":
+        return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+    return json.dumps(event) + "\n"
+
+# 🧾 card_type + one event per field of a finished extraction
+def emit_fields(emit, collected_data):
+    emit({"event": "card_type", "card_type": collected_data["card_type"]})
+    for name, value in collected_data.get("data", {}).items():
+        emit({"event": "field", "name": name, "value": value})
+
+# 🚀 run(emit) -> (body, status). Plain JSON by default; with streaming, every
+# emitted event is sent as it happens and the body becomes the closing
+# "result" (or "error") event.
+def respond(run, endpoint):
+    start = request.environ.get("metrics.start", time.perf_counter())
+    fmt = requested_stream_format()
+    if fmt is None:
+        body, status = run(lambda event: None)
+        FIRST_USEFUL_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint, mode="json")
+        return jsonify(body), status
+
+    events = queue.Queue()
+    cancelled = threading.Event()
+    release_slot = take_admission_slot()  # held until the pipeline below finishes
+
+    def emit(event):
+        if cancelled.is_set():
+            raise StreamCancelled()
+        events.put(event)
+
+    def worker():
+        try:
+            body, status = run(emit)
+            events.put({"event": "result" if status < 400 else "error", "status": status, **body})
+        except StreamCancelled:
+            print(f"⚠️ Client left streamed {endpoint}, stopped early")
+        except Overloaded as e:
+            events.put({"event": "error", "status": e.status, "error": str(e), "retry_after": e.retry_after})
+        except Exception as e:
+            print(f"❌ Error during streamed {endpoint}: {e}")
+            events.put({"event": "error", "status": 500, "error": f"Unexpected error: {str(e)}"})
+        finally:
+            release_slot()
+            events.put(None)
+
+    threading.Thread(target=worker, name=f"stream-{endpoint}", daemon=True).start()
+
+    def generate():
+        useful_sent = False
+        card_type = None
+        try:
+            while True:
+                event = events.get()
+                if event is None:
+                    return
+                if event["event"] == "card_type":
+                    if event["card_type"] == card_type:
+                        continue  # already announced earlier in the pipeline
+                    card_type = event["card_type"]
+                if not useful_sent and event["event"] in USEFUL_EVENTS:
+                    FIRST_USEFUL_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint, mode=fmt)
+                    useful_sent = True
+                yield _encode(event, fmt)
+        finally:
+            cancelled.set()  # client disconnected (GeneratorExit) or stream done: stop emitting
+
+    return Response(generate(), mimetype=STREAM_FORMATS[fmt],
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
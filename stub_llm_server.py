@@ -0,0 +1,65 @@
+import json
+import os
+import random
+import time
+from flask import Flask, request, jsonify
+
+# 🧪 Local stand-in for Gemini/Groq: canned responses, configurable latency and errors
+#   STUB_LATENCY     fixed:<ms> | uniform:<lo_ms>,<hi_ms> | lognormal:<median_ms>,<sigma>
+#   STUB_ERROR_RATE  fraction of calls answered with 429/500 (e.g. 0.02)
+#   STUB_RESPONSES   optional JSON file {task: response} overriding the defaults
+#   STUB_SEED        seed for reproducible runs
+app = Flask(__name__)
+
+STUB_LATENCY = os.getenv("STUB_LATENCY", "lognormal:800,0.35")
+STUB_ERROR_RATE = float(os.getenv("STUB_ERROR_RATE", "0"))
+STUB_RESPONSES = os.getenv("STUB_RESPONSES")
+
+_random = random.Random(os.getenv("STUB_SEED"))
+
+CARD_FIELDS = {"Name": "RAHUL SHARMA", "DOB": "15/08/1985", "Number": "ABCDE1234F"}
+
+RESPONSES = {
+    "classify": "PAN Card",
+    "fused": {"card_type": "PAN Card", "confidence": 0.95, **CARD_FIELDS},
+    "fused_text": {"card_type": "Udyam Certificate", "confidence": 0.95, "Name": "SRI TRADERS",
+                   "DOB": "UDYAM-TN-02-0012345", "Number": "UDYAM-TN-02-0012345"},
+    "pan": CARD_FIELDS,
+    "adhaar": {"Name": "ARUN KUMAR", "DOB": "01/02/1990", "Number": "234567890124"},
+    "udayam": {"Name": "SRI TRADERS", "DOB": "UDYAM-TN-02-0012345", "Number": "UDYAM-TN-02-0012345"},
+    "groq_extract": {"Full Name": "RAHUL SHARMA", "Date of Birth": "15/08/1985", "ID Number": "ABCDE1234F"},
+    "generic": "OK",
+}
+if STUB_RESPONSES:
+    with open(STUB_RESPONSES) as f:
+        RESPONSES.update(json.load(f))
+
+def sample_latency_ms():
+    kind, _, args = STUB_LATENCY.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return values[0]
+    if kind == "uniform":
+        return _random.uniform(values[0], values[1])
+    if kind == "lognormal":
+        median, sigma = values
+        return _random.lognormvariate(0, sigma) * median
+    return 0.0
+
+@app.route("/v1/complete", methods=["POST"])
+def complete():
+    body = request.get_json() or {}
+    time.sleep(sample_latency_ms() / 1000)
+
+    if _random.random() < STUB_ERROR_RATE:
+        if _random.random() < 0.5:
+            return jsonify({"error": "rate limited"}), 429, {"Retry-After": "1"}
+        return jsonify({"error": "upstream error"}), 500
+
+    response = RESPONSES.get(body.get("task"), RESPONSES["generic"])
+    text = response if isinstance(response, str) else json.dumps(response)
+    return jsonify({"text": text})
+
+# 🏁 Run server
+if __name__ == "__main__":
+    app.run(host="127.0.0.1", port=int(os.getenv("STUB_PORT", "8099")), threaded=True)
@@ -0,0 +1,14 @@
+from local_extractor import extract_aadhaar_fields
+from ocr_classifier import AADHAAR_PATTERN
+
+
+# 2345 6789 0124 passes Verhoeff, so it would be accepted if matched on its own
+def test_vid_tail_is_not_an_aadhaar_number():
+    lines = ["VID : 9123 2345 6789 0124"]
+    assert extract_aadhaar_fields(lines)["Number"] is None
+    assert AADHAAR_PATTERN.search(lines[0]) is None
+
+
+def test_aadhaar_number_next_to_vid_line():
+    lines = ["RAHUL SHARMA", "DOB: 15/08/1985", "2345 6789 0107", "VID : 9123 2345 6789 0124"]
+    assert extract_aadhaar_fields(lines) == {"Name": "RAHUL SHARMA", "DOB": "15/08/1985", "Number": "234567890107"}
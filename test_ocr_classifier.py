@@ -0,0 +1,12 @@
+from ocr_classifier import classify_document_type_from_ocr
+
+
+def test_keywords_match_whole_words_only():
+    lines = ["PROVIDED BY DAVID", "GOVERNMENT OF INDIA", "2345 6789 0107"]
+    card_type, confidence = classify_document_type_from_ocr(lines)
+    assert (card_type, confidence) == ("Aadhaar Card", 0.7)
+
+
+def test_vid_keyword():
+    lines = ["GOVERNMENT OF INDIA", "VID : 9123 2345 6789 0124"]
+    assert classify_document_type_from_ocr(lines) == ("Aadhaar Card", 0.4)
@@ -0,0 +1,127 @@
+import base64
+import os
+
+from flask import request
+
+# ⚙️ Size limits for single-image uploads (decoded image bytes) and PDFs
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(50 * 1024 * 1024)))
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_BYTES", str(100 * 1024 * 1024)))  # whole /extract/batch body
+UPLOAD_CHUNK_SIZE = 64 * 1024
+MULTIPART_OVERHEAD = 64 * 1024  # boundaries, headers and the small form fields
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def _too_large(limit=UPLOAD_MAX_BYTES, what="Image"):
+    return UploadError(f"{what} larger than {limit} bytes", 413)
+
+# 📥 Read a body in chunks, giving up as soon as it passes the limit
+def _read_limited(stream, limit=UPLOAD_MAX_BYTES, what="Image"):
+    chunks = []
+    size = 0
+    while True:
+        chunk = stream.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > limit:
+            raise _too_large(limit, what)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+# 📎 "file" / "image" part of a multipart body (the form parser needs a bounded body)
+def _multipart_file(limit):
+    if request.content_length is None:
+        raise UploadError("Content-Length required", 411)
+    if request.content_length > limit + MULTIPART_OVERHEAD:
+        return None, True
+    file = request.files.get("file") or request.files.get("image")
+    if file is None or file.filename == "":
+        raise UploadError("No file provided")
+    return file, False
+
+# 🖼️ (image bytes, options) from the current request. Accepted bodies:
+#   - raw image/* (options from the query string)
+#   - multipart/form-data with a "file" or "image" part (options from the form)
+#   - JSON {"image": "<base64 or data URL>", ...} (legacy web UI)
+def read_image_upload():
+    mimetype = request.mimetype
+    content_length = request.content_length
+
+    if mimetype.startswith("image/"):
+        if content_length is not None and content_length > UPLOAD_MAX_BYTES:
+            raise _too_large()
+        image_bytes = _read_limited(request.stream)
+        if not image_bytes:
+            raise UploadError("No image provided")
+        return image_bytes, request.args
+
+    if mimetype == "multipart/form-data":
+        file, too_large = _multipart_file(UPLOAD_MAX_BYTES)
+        if too_large:
+            raise _too_large()
+        return _read_limited(file.stream), request.form
+
+    data = request.get_json(silent=True) or {}
+    image_base64 = data.get("image")
+    if not image_base64:
+        raise UploadError("No image provided")
+    return _decode_base64_image(image_base64), data
+
+def _decode_base64_image(image_base64):
+    if "," in image_base64:
+        image_base64 = image_base64.split(",")[1]
+    if len(image_base64) * 3 // 4 > UPLOAD_MAX_BYTES:
+        raise _too_large()
+    return base64.b64decode(image_base64)
+
+# 📚 Items of a batch: multipart "files" parts or JSON {"images": [base64, ...]}.
+# The body is capped at BATCH_MAX_BYTES (413) and every item at UPLOAD_MAX_BYTES;
+# items that are too large or fail to decode come back as exceptions so they get their own error
+def read_batch_uploads():
+    content_length = request.content_length
+    if content_length is None:
+        raise UploadError("Content-Length required", 411)
+
+    if request.mimetype == "multipart/form-data":
+        if content_length > BATCH_MAX_BYTES + MULTIPART_OVERHEAD:
+            raise _too_large(BATCH_MAX_BYTES, "Batch")
+        uploads = []
+        for file in request.files.getlist("files"):
+            try:
+                uploads.append(_read_limited(file.stream))
+            except UploadError as e:
+                uploads.append(e)
+        return uploads
+
+    if content_length > BATCH_MAX_BYTES * 4 // 3 + MULTIPART_OVERHEAD:  # base64 is 4/3 larger
+        raise _too_large(BATCH_MAX_BYTES, "Batch")
+    data = request.get_json(silent=True) or {}
+    uploads = []
+    for image_base64 in data.get("images", []):
+        try:
+            uploads.append(_decode_base64_image(image_base64))
+        except Exception as e:
+            uploads.append(e)
+    return uploads
+
+# 📄 (PDF bytes, options) from a raw application/pdf body or a multipart "file" part
+def read_pdf_upload():
+    if request.mimetype == "multipart/form-data":
+        file, too_large = _multipart_file(PDF_MAX_BYTES)
+        if too_large:
+            raise _too_large(PDF_MAX_BYTES, "PDF")
+        pdf_bytes, options = _read_limited(file.stream, PDF_MAX_BYTES, "PDF"), request.form
+    elif request.mimetype == "application/pdf":
+        if request.content_length is not None and request.content_length > PDF_MAX_BYTES:
+            raise _too_large(PDF_MAX_BYTES, "PDF")
+        pdf_bytes, options = _read_limited(request.stream, PDF_MAX_BYTES, "PDF"), request.args
+    else:
+        raise UploadError("Expected application/pdf or multipart/form-data", 415)
+
+    if not pdf_bytes.startswith(b"%PDF"):
+        raise UploadError("Not a PDF")
+    return pdf_bytes, options